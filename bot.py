@@ -510,7 +510,7 @@ class ArbitrageBotDataCollection:
     
     async def _place_order(self, symbol: str, is_buy: bool, size: float, price: float, reduce_only: bool = False) -> Dict:
         """Place order via exchange."""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
         def place():
             return self.exchange.order(
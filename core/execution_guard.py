@@ -10,7 +10,6 @@ Guarantees delta-neutral execution:
 import asyncio
 import logging
 import time
-from uuid import uuid4
 from typing import Optional, Tuple
 from dataclasses import dataclass
 
@@ -113,8 +112,8 @@ class ExecutionGuard:
         
         FIX APPLIED: Check for Exception instances from asyncio.gather
         """
-        spot_cloid = uuid4().hex
-        perp_cloid = uuid4().hex
+        spot_cloid = self.client.next_cloid()
+        perp_cloid = self.client.next_cloid()
         
         # CRITICAL FIX: Spot @150 is USDC-denominated (~$1.0 per unit)
         # The actual token value is the perp price (~$27)
@@ -259,11 +258,11 @@ class ExecutionGuard:
         if leg == "spot":
             # We bought spot, need to sell it
             unwind_price = round(price * (1 - unwind_slippage), 5)
-            await self.client.place_order(coin, "spot", False, size, unwind_price, uuid4().hex)
+            await self.client.place_order(coin, "spot", False, size, unwind_price, self.client.next_cloid())
         else:
             # We shorted perp, need to buy it back
             unwind_price = round(price * (1 + unwind_slippage), 5)
-            await self.client.place_order(coin, "perp", True, size, unwind_price, uuid4().hex)
+            await self.client.place_order(coin, "perp", True, size, unwind_price, self.client.next_cloid())
     
     async def _close_partial(self, coin: str, percentage: float) -> bool:
         """Close a percentage of a position."""
@@ -286,9 +285,9 @@ class ExecutionGuard:
         # Close both legs
         results = await asyncio.gather(
             self.client.place_order(coin, "spot", False, spot_close, 
-                                     current_spot * 0.98, uuid4().hex),
+                                     current_spot * 0.98, self.client.next_cloid()),
             self.client.place_order(coin, "perp", True, perp_close,
-                                     current_perp * 1.02, uuid4().hex),
+                                     current_perp * 1.02, self.client.next_cloid()),
             return_exceptions=True
         )
         
@@ -10,13 +10,15 @@ IMPORTANT: Opens DB in read-only mode to prevent locking.
 import streamlit as st
 import sqlite3
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
-from datetime import datetime, timedelta
+import httpx
+import orjson
+from datetime import datetime
+import importlib.util
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
 
 # Add parent directory to path for config import
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -46,28 +48,60 @@ except:
 
 # ========== MARKET DATA FETCHING ==========
 
+HL_INFO_URL = 'https://api.hyperliquid.xyz/info'
+META_CACHE_TTL = 60  # metaAndAssetCtxs (~50 KB) is reused across two market-data refreshes
+
+
+@st.cache_resource
+def get_http() -> httpx.Client:
+    """Shared HTTP/2 client - keeps the TLS session warm across reruns."""
+    return httpx.Client(
+        http2=True,
+        timeout=5,
+        headers={'content-type': 'application/json'}
+    )
+
+
+@st.cache_resource
+def get_info_cache() -> Dict[bytes, tuple]:
+    """In-memory /info response cache shared across reruns: body -> (expires_at, data)."""
+    return {}
+
+
+def post_info(payload: dict, expire_after: float = 0, timeout: float = 5):
+    """
+    POST an /info request and decode it, reusing a cached response for up to expire_after seconds.
+    
+    Hyperliquid sends no ETag/Last-Modified on /info, so there is nothing to
+    revalidate; a fresh-enough cached body is served as-is instead.
+    """
+    body = orjson.dumps(payload)
+    cache = get_info_cache()
+    now = time.monotonic()
+    
+    entry = cache.get(body)
+    if entry is not None and now < entry[0]:
+        return entry[1]
+    
+    response = get_http().post(HL_INFO_URL, content=body, timeout=timeout)
+    data = orjson.loads(response.content)
+    if expire_after > 0 and response.is_success:
+        cache[body] = (now + expire_after, data)
+    return data
+
+
 @st.cache_data(ttl=30)  # Cache for 30 seconds
 def fetch_market_data():
     """Fetch live market data from Hyperliquid API."""
     try:
         # Get all mids for price
-        mids_response = requests.post(
-            'https://api.hyperliquid.xyz/info',
-            json={'type': 'allMids'},
-            timeout=5
-        )
-        mids = mids_response.json()
+        mids = post_info({'type': 'allMids'})
         if mids is None:
             raise ValueError("allMids returned None")
         price = float(mids.get(COIN_NAME, 0))
         
         # Get meta for funding rate - use metaAndAssetCtxs which has actual funding data
-        meta_response = requests.post(
-            'https://api.hyperliquid.xyz/info',
-            json={'type': 'metaAndAssetCtxs'},
-            timeout=5
-        )
-        data = meta_response.json()
+        data = post_info({'type': 'metaAndAssetCtxs'}, expire_after=META_CACHE_TTL)
         if data is None or not isinstance(data, list) or len(data) < 2:
             raise ValueError("metaAndAssetCtxs returned invalid data")
         meta, asset_ctxs = data[0], data[1]
@@ -82,12 +116,7 @@ def fetch_market_data():
                     break
         
         # Get L2 book for spread
-        l2_response = requests.post(
-            'https://api.hyperliquid.xyz/info',
-            json={'type': 'l2Book', 'coin': COIN_NAME},
-            timeout=5
-        )
-        l2 = l2_response.json()
+        l2 = post_info({'type': 'l2Book', 'coin': COIN_NAME})
         
         best_bid = 0.0
         best_ask = 0.0
@@ -129,20 +158,17 @@ def fetch_market_data():
 def fetch_funding_history(hours: int = 48):
     """Fetch historical funding rates from Hyperliquid API."""
     try:
-        end_time = int(datetime.now().timestamp() * 1000)
-        start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
+        # Align the window to 5-minute boundaries (matching the cache TTL) so the
+        # request body is identical between misses; funding is hourly anyway
+        end_time = (int(time.time()) // 300) * 300 * 1000
+        start_time = end_time - hours * 3600 * 1000
         
-        response = requests.post(
-            'https://api.hyperliquid.xyz/info',
-            json={
-                'type': 'fundingHistory',
-                'coin': COIN_NAME,
-                'startTime': start_time,
-                'endTime': end_time
-            },
-            timeout=10
-        )
-        data = response.json()
+        data = post_info({
+            'type': 'fundingHistory',
+            'coin': COIN_NAME,
+            'startTime': start_time,
+            'endTime': end_time
+        }, timeout=10)
         
         if not data:
             return pd.DataFrame()
@@ -160,6 +186,11 @@ def fetch_funding_history(hours: int = 48):
 
 # ========== DATABASE HELPERS ==========
 
+# Arrow-backed frames store numeric columns as contiguous buffers instead of
+# converting through Python objects. Falls back to numpy dtypes without pyarrow.
+READ_SQL_KWARGS = {"dtype_backend": "pyarrow"} if importlib.util.find_spec("pyarrow") else {}
+
+
 def get_db_connection():
     """Get read-only database connection to prevent locking."""
     uri = f"file:{DB_PATH}?mode=ro"
@@ -170,16 +201,105 @@ def query_df(sql: str) -> pd.DataFrame:
     """Execute query and return DataFrame."""
     try:
         with get_db_connection() as conn:
-            return pd.read_sql_query(sql, conn)
+            return pd.read_sql_query(sql, conn, **READ_SQL_KWARGS)
     except Exception as e:
         return pd.DataFrame()
 
 
+@st.cache_data(ttl=60)  # The bot creates the DB once; no need to stat every rerun
 def check_db_exists() -> bool:
     """Check if database file exists."""
     return os.path.exists(DB_PATH)
 
 
+# Queries behind the three tabs. They are independent of each other, so
+# prefetch_tab_frames() runs them concurrently on separate read-only connections.
+TAB_QUERIES = {
+    "open_positions": """
+        SELECT
+            coin,
+            size,
+            size_usd,
+            entry_price_spot,
+            entry_price_perp,
+            opened_at,
+            status
+        FROM positions
+        WHERE status = 'OPEN'
+        ORDER BY opened_at DESC
+    """,
+    "daily_funding": """
+        SELECT
+            date(timestamp) as date,
+            SUM(amount_usdc) as daily_funding,
+            COUNT(*) as payments
+        FROM funding_log
+        GROUP BY date(timestamp)
+        ORDER BY date DESC
+        LIMIT 30
+    """,
+    "cumulative_funding": """
+        SELECT
+            timestamp,
+            amount_usdc,
+            SUM(amount_usdc) OVER (ORDER BY timestamp) as cumulative
+        FROM funding_log
+        ORDER BY timestamp
+    """,
+    "rebalance_events": """
+        SELECT
+            event_type,
+            margin_ratio_before,
+            margin_ratio_after,
+            amount_usd,
+            notes,
+            timestamp
+        FROM rebalance_events
+        ORDER BY timestamp DESC
+        LIMIT 20
+    """,
+    "trade_history": """
+        SELECT
+            coin,
+            side,
+            market,
+            size,
+            price,
+            cloid,
+            timestamp
+        FROM trades
+        ORDER BY timestamp DESC
+        LIMIT 50
+    """,
+    "position_history": """
+        SELECT
+            coin,
+            size_usd,
+            entry_price_spot,
+            entry_price_perp,
+            exit_price_spot,
+            exit_price_perp,
+            status,
+            close_reason,
+            opened_at,
+            closed_at
+        FROM positions
+        ORDER BY opened_at DESC
+        LIMIT 20
+    """,
+}
+
+
+def prefetch_tab_frames() -> Dict[str, pd.DataFrame]:
+    """Run all tab queries in parallel. Returns {} if the DB doesn't exist yet."""
+    if not check_db_exists():
+        return {}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {name: pool.submit(query_df, sql) for name, sql in TAB_QUERIES.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
 # ========== SIDEBAR ==========
 
 def render_sidebar():
@@ -206,20 +326,23 @@ def render_sidebar():
         # Funding stats from DB
         st.sidebar.subheader("💰 Earnings")
         
-        funding_df = query_df("SELECT SUM(amount_usdc) as total FROM funding_log")
-        if not funding_df.empty:
-            total_funding = funding_df.iloc[0]['total'] or 0
-            st.sidebar.metric("Total Funded", f"${total_funding:.4f}")
-        
-        # Position count
-        pos_df = query_df("SELECT COUNT(*) as count FROM positions WHERE status = 'OPEN'")
-        if not pos_df.empty:
-            st.sidebar.metric("Open Positions", pos_df.iloc[0]['count'])
-        
-        # Trade count
-        trade_df = query_df("SELECT COUNT(*) as count FROM trades")
-        if not trade_df.empty:
-            st.sidebar.metric("Total Trades", trade_df.iloc[0]['count'])
+        # All three counters in one query, rendered as a single table
+        stats_df = query_df("""
+            SELECT
+                (SELECT COALESCE(SUM(amount_usdc), 0) FROM funding_log) as total_funded,
+                (SELECT COUNT(*) FROM positions WHERE status = 'OPEN') as open_positions,
+                (SELECT COUNT(*) FROM trades) as total_trades
+        """)
+        if not stats_df.empty:
+            stats = stats_df.iloc[0]
+            st.sidebar.table(pd.DataFrame({
+                "Metric": ["Total Funded", "Open Positions", "Total Trades"],
+                "Value": [
+                    f"${stats['total_funded']:.4f}",
+                    str(stats['open_positions']),
+                    str(stats['total_trades'])
+                ]
+            }).set_index("Metric"))
     
     # Refresh info
     st.sidebar.markdown("---")
@@ -340,8 +463,9 @@ def render_market_monitor():
 
 # ========== TAB 1: LIVE STATUS ==========
 
-def render_live_status():
+def render_live_status(frames: Dict[str, pd.DataFrame]):
     """Render live status tab."""
+    import plotly.graph_objects as go  # Deferred: plotly is slow to import
     
     # Live market monitor at top
     render_market_monitor()
@@ -396,19 +520,18 @@ def render_live_status():
         
         st.plotly_chart(fig, use_container_width=True)
         
-        # Stats row
+        # Stats row - reduce the raw array once instead of going through pandas four times
+        apr = funding_df['apr'].to_numpy()
+        avg_apr, max_apr, min_apr, current_apr = apr.mean(), apr.max(), apr.min(), apr[-1]
+        
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            avg_apr = funding_df['apr'].mean()
             st.metric("Avg APR (48h)", f"{avg_apr:.2f}%")
         with col2:
-            max_apr = funding_df['apr'].max()
             st.metric("Max APR", f"{max_apr:.2f}%")
         with col3:
-            min_apr = funding_df['apr'].min()
             st.metric("Min APR", f"{min_apr:.2f}%")
         with col4:
-            current_apr = funding_df['apr'].iloc[-1] if len(funding_df) > 0 else 0
             st.metric("Current APR", f"{current_apr:.2f}%")
     else:
         st.warning("No funding history data available.")
@@ -423,19 +546,7 @@ def render_live_status():
         st.info("Database not initialized yet.")
         return
     
-    positions_df = query_df("""
-        SELECT 
-            coin,
-            size,
-            size_usd,
-            entry_price_spot,
-            entry_price_perp,
-            opened_at,
-            status
-        FROM positions 
-        WHERE status = 'OPEN'
-        ORDER BY opened_at DESC
-    """)
+    positions_df = frames.get("open_positions", pd.DataFrame())
     
     if positions_df.empty:
         st.info("No open positions. Bot is waiting for opportunities.")
@@ -460,18 +571,10 @@ def render_live_status():
     # Recent trades
     st.subheader("Recent Trades")
     
-    trades_df = query_df("""
-        SELECT 
-            coin,
-            side,
-            market,
-            size,
-            price,
-            timestamp
-        FROM trades 
-        ORDER BY timestamp DESC 
-        LIMIT 10
-    """)
+    # Last 10 rows of the prefetched trade history, without the cloid column
+    trades_df = frames.get("trade_history", pd.DataFrame())
+    if not trades_df.empty:
+        trades_df = trades_df.drop(columns=["cloid"]).head(10)
     
     if trades_df.empty:
         st.info("No trades executed yet.")
@@ -485,8 +588,10 @@ def render_live_status():
 
 # ========== TAB 2: PERFORMANCE ==========
 
-def render_performance():
+def render_performance(frames: Dict[str, pd.DataFrame]):
     """Render performance tab."""
+    import plotly.express as px  # Deferred: plotly is slow to import
+    
     st.header("📈 Performance")
     
     if not check_db_exists():
@@ -496,16 +601,7 @@ def render_performance():
     # Funding payments over time
     st.subheader("Funding Payments")
     
-    funding_df = query_df("""
-        SELECT 
-            date(timestamp) as date,
-            SUM(amount_usdc) as daily_funding,
-            COUNT(*) as payments
-        FROM funding_log 
-        GROUP BY date(timestamp)
-        ORDER BY date DESC
-        LIMIT 30
-    """)
+    funding_df = frames.get("daily_funding", pd.DataFrame())
     
     if funding_df.empty:
         st.info("No funding payments recorded yet. Payments are credited hourly when you have an open position.")
@@ -543,14 +639,7 @@ def render_performance():
     # Cumulative equity
     st.subheader("Cumulative Earnings")
     
-    cumulative_df = query_df("""
-        SELECT 
-            timestamp,
-            amount_usdc,
-            SUM(amount_usdc) OVER (ORDER BY timestamp) as cumulative
-        FROM funding_log 
-        ORDER BY timestamp
-    """)
+    cumulative_df = frames.get("cumulative_funding", pd.DataFrame())
     
     if not cumulative_df.empty:
         fig = px.line(
@@ -565,7 +654,7 @@ def render_performance():
 
 # ========== TAB 3: LOGS ==========
 
-def render_logs():
+def render_logs(frames: Dict[str, pd.DataFrame]):
     """Render logs tab."""
     st.header("📋 Activity Logs")
     
@@ -576,18 +665,7 @@ def render_logs():
     # Rebalance events
     st.subheader("Rebalance Events")
     
-    rebalance_df = query_df("""
-        SELECT 
-            event_type,
-            margin_ratio_before,
-            margin_ratio_after,
-            amount_usd,
-            notes,
-            timestamp
-        FROM rebalance_events 
-        ORDER BY timestamp DESC 
-        LIMIT 20
-    """)
+    rebalance_df = frames.get("rebalance_events", pd.DataFrame())
     
     if rebalance_df.empty:
         st.info("No rebalance events recorded. These occur when margin gets low.")
@@ -601,19 +679,7 @@ def render_logs():
     # All trades
     st.subheader("Trade History")
     
-    all_trades_df = query_df("""
-        SELECT 
-            coin,
-            side,
-            market,
-            size,
-            price,
-            cloid,
-            timestamp
-        FROM trades 
-        ORDER BY timestamp DESC 
-        LIMIT 50
-    """)
+    all_trades_df = frames.get("trade_history", pd.DataFrame())
     
     if all_trades_df.empty:
         st.info("No trades in history.")
@@ -627,22 +693,7 @@ def render_logs():
     # Position history
     st.subheader("Position History")
     
-    positions_df = query_df("""
-        SELECT 
-            coin,
-            size_usd,
-            entry_price_spot,
-            entry_price_perp,
-            exit_price_spot,
-            exit_price_perp,
-            status,
-            close_reason,
-            opened_at,
-            closed_at
-        FROM positions 
-        ORDER BY opened_at DESC 
-        LIMIT 20
-    """)
+    positions_df = frames.get("position_history", pd.DataFrame())
     
     if not positions_df.empty:
         st.dataframe(
@@ -660,17 +711,20 @@ def main():
     # Sidebar
     render_sidebar()
     
+    # Load every tab's data up front so the queries overlap
+    frames = prefetch_tab_frames()
+    
     # Main content tabs
     tab1, tab2, tab3 = st.tabs(["📊 Live Status", "📈 Performance", "📋 Logs"])
     
     with tab1:
-        render_live_status()
+        render_live_status(frames)
     
     with tab2:
-        render_performance()
+        render_performance(frames)
     
     with tab3:
-        render_logs()
+        render_logs(frames)
     
     # Auto-refresh
     time.sleep(30)
@@ -5,134 +5,257 @@ SQLite persistence layer for positions, funding payments, trades, and events.
 Uses aiosqlite for async operations.
 """
 
+import asyncio
 import aiosqlite
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+WRITE_BATCH_SIZE = 50       # Max queued inserts per commit
+WRITE_FLUSH_INTERVAL = 0.1  # Seconds to wait for a batch to fill
+
+# Hot statements kept as constants so sqlite3's per-connection statement
+# cache (keyed on SQL text) reuses the compiled form on every call
+_SQL_INSERT_POSITION = """
+    INSERT INTO positions (coin, size, size_usd, entry_price_spot, entry_price_perp)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_FUNDING = """
+    INSERT INTO funding_log (coin, position_id, amount_usdc, rate_applied, position_size)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_TRADE = """
+    INSERT INTO trades (position_id, coin, side, market, size, price, cloid)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_REBALANCE = """
+    INSERT INTO rebalance_events 
+    (position_id, event_type, margin_ratio_before, margin_ratio_after, amount_usd, notes)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 
 class Database:
     """Async SQLite database for funding bot state management."""
     
     def __init__(self, db_file: str = "funding_bot.db"):
         self.db_file = db_file
+        self._db: Optional[aiosqlite.Connection] = None
+        self._write_queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._tx_lock = asyncio.Lock()  # Keeps direct writes out of an in-flight batch
+        self._init_lock = asyncio.Lock()  # One connection and one writer, however many first callers
+    
+    async def _get_db(self) -> aiosqlite.Connection:
+        """Get the shared connection, opening it and the batch writer on first use."""
+        if self._db is not None:
+            return self._db
+        
+        async with self._init_lock:
+            if self._db is None:
+                db = await aiosqlite.connect(self.db_file)
+                db.row_factory = aiosqlite.Row
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.execute("PRAGMA temp_store=MEMORY")
+                await db.execute("PRAGMA mmap_size=268435456")
+                self._db = db
+                self._writer_task = asyncio.create_task(self._writer_loop())
+        return self._db
+    
+    async def _writer_loop(self):
+        """Commit queued inserts in batches of up to WRITE_BATCH_SIZE."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, tuple]] = [await self._write_queue.get()]
+            deadline = loop.time() + WRITE_FLUSH_INTERVAL
+            while len(batch) < WRITE_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                # One transaction per batch instead of one commit per insert
+                async with self._tx_lock:
+                    try:
+                        for sql, params in batch:
+                            await self._db.execute(sql, params)
+                        await self._db.commit()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Batch write failed ({len(batch)} rows), retrying per row: {e}")
+                        await self._rollback()
+                        # One bad row must not take the rest of the batch with it
+                        for sql, params in batch:
+                            try:
+                                await self._db.execute(sql, params)
+                                await self._db.commit()
+                            except Exception as e:
+                                logger.error(f"❌ Write failed: {e}")
+                                await self._rollback()
+            except Exception as e:
+                # Keep the writer alive; a dead writer would hang flush()/close()
+                logger.error(f"❌ Batch writer error: {e}")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    async def _rollback(self):
+        """Roll back the open transaction, logging rather than raising on failure."""
+        try:
+            await self._db.rollback()
+        except Exception as e:
+            logger.error(f"❌ Rollback failed: {e}")
+    
+    async def _enqueue_write(self, sql: str, params: tuple):
+        """Queue an insert for the batch writer."""
+        await self._get_db()
+        await self._write_queue.put((sql, params))
+    
+    async def flush(self):
+        """Wait until every queued write has been committed."""
+        if self._writer_task is not None:
+            await self._write_queue.join()
+    
+    async def close(self):
+        """Flush pending writes and close the shared connection."""
+        await self.flush()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
     
     async def init_tables(self):
         """Initialize all database tables."""
-        async with aiosqlite.connect(self.db_file) as db:
-            # Table 1: Positions (State)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS positions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    coin TEXT NOT NULL,
-                    size REAL NOT NULL,
-                    size_usd REAL NOT NULL,
-                    entry_price_spot REAL,
-                    entry_price_perp REAL,
-                    exit_price_spot REAL,
-                    exit_price_perp REAL,
-                    status TEXT DEFAULT 'OPEN',
-                    opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    closed_at TIMESTAMP,
-                    close_reason TEXT
-                )
-            """)
-            
-            # Table 2: Funding Payments (Your Salary)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS funding_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    coin TEXT NOT NULL,
-                    position_id INTEGER,
-                    amount_usdc REAL NOT NULL,
-                    rate_applied REAL NOT NULL,
-                    position_size REAL NOT NULL,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (position_id) REFERENCES positions(id)
-                )
-            """)
-            
-            # Table 3: Trade Executions (Audit Trail)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS trades (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    position_id INTEGER,
-                    coin TEXT NOT NULL,
-                    side TEXT NOT NULL,
-                    market TEXT NOT NULL,
-                    size REAL NOT NULL,
-                    price REAL NOT NULL,
-                    cloid TEXT,
-                    status TEXT DEFAULT 'FILLED',
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (position_id) REFERENCES positions(id)
-                )
-            """)
-            
-            # Table 4: Rebalance Events (Safety Log)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS rebalance_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    position_id INTEGER,
-                    event_type TEXT NOT NULL,
-                    margin_ratio_before REAL,
-                    margin_ratio_after REAL,
-                    amount_usd REAL,
-                    notes TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (position_id) REFERENCES positions(id)
-                )
-            """)
-            
-            await db.commit()
-            logger.info("💾 Database initialized with all tables.")
+        db = await self._get_db()
+        # Table 1: Positions (State)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS positions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                coin TEXT NOT NULL,
+                size REAL NOT NULL,
+                size_usd REAL NOT NULL,
+                entry_price_spot REAL,
+                entry_price_perp REAL,
+                exit_price_spot REAL,
+                exit_price_perp REAL,
+                status TEXT DEFAULT 'OPEN',
+                opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                closed_at TIMESTAMP,
+                close_reason TEXT
+            )
+        """)
+        
+        # Table 2: Funding Payments (Your Salary)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS funding_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                coin TEXT NOT NULL,
+                position_id INTEGER,
+                amount_usdc REAL NOT NULL,
+                rate_applied REAL NOT NULL,
+                position_size REAL NOT NULL,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (position_id) REFERENCES positions(id)
+            )
+        """)
+        
+        # Table 3: Trade Executions (Audit Trail)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                position_id INTEGER,
+                coin TEXT NOT NULL,
+                side TEXT NOT NULL,
+                market TEXT NOT NULL,
+                size REAL NOT NULL,
+                price REAL NOT NULL,
+                cloid TEXT,
+                status TEXT DEFAULT 'FILLED',
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (position_id) REFERENCES positions(id)
+            )
+        """)
+        
+        # Table 4: Rebalance Events (Safety Log)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS rebalance_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                position_id INTEGER,
+                event_type TEXT NOT NULL,
+                margin_ratio_before REAL,
+                margin_ratio_after REAL,
+                amount_usd REAL,
+                notes TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (position_id) REFERENCES positions(id)
+            )
+        """)
+        
+        # Indexes for the hot WHERE columns
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_positions_coin_status ON positions(coin, status)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_positions_status ON positions(status)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_funding_position ON funding_log(position_id)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_position ON trades(position_id)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_rebalance_position ON rebalance_events(position_id)")
+        
+        await db.commit()
+        logger.info("💾 Database initialized with all tables.")
     
     # ==================== Position Methods ====================
     
     async def create_position(self, coin: str, size: float, size_usd: float,
                                entry_spot: float, entry_perp: float) -> int:
         """Create a new open position. Returns position ID."""
-        async with aiosqlite.connect(self.db_file) as db:
-            cursor = await db.execute("""
-                INSERT INTO positions (coin, size, size_usd, entry_price_spot, entry_price_perp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (coin, size, size_usd, entry_spot, entry_perp))
+        db = await self._get_db()
+        async with self._tx_lock:
+            cursor = await db.execute(
+                _SQL_INSERT_POSITION, (coin, size, size_usd, entry_spot, entry_perp)
+            )
             await db.commit()
-            logger.info(f"📥 Created position #{cursor.lastrowid}: {size} {coin}")
-            return cursor.lastrowid
+        logger.info(f"📥 Created position #{cursor.lastrowid}: {size} {coin}")
+        return cursor.lastrowid
     
     async def get_open_positions(self) -> List[Dict[str, Any]]:
         """Get all open positions."""
-        async with aiosqlite.connect(self.db_file) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT * FROM positions WHERE status = 'OPEN'"
-            )
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        db = await self._get_db()
+        cursor = await db.execute(
+            "SELECT * FROM positions WHERE status = 'OPEN'"
+        )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
     
     async def get_position_by_coin(self, coin: str) -> Optional[Dict[str, Any]]:
         """Get open position for a specific coin."""
-        async with aiosqlite.connect(self.db_file) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT * FROM positions WHERE coin = ? AND status = 'OPEN'",
-                (coin,)
-            )
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        db = await self._get_db()
+        cursor = await db.execute(
+            "SELECT * FROM positions WHERE coin = ? AND status = 'OPEN'",
+            (coin,)
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
     
     async def has_position(self, coin: str) -> bool:
         """Check if there's an open position for a coin."""
-        pos = await self.get_position_by_coin(coin)
-        return pos is not None
+        db = await self._get_db()
+        cursor = await db.execute(
+            "SELECT 1 FROM positions WHERE coin = ? AND status = 'OPEN' LIMIT 1",
+            (coin,)
+        )
+        return await cursor.fetchone() is not None
     
     async def mark_closed(self, position_id: int, reason: str,
                           exit_spot: float = 0, exit_perp: float = 0):
         """Mark a position as closed with reason."""
-        async with aiosqlite.connect(self.db_file) as db:
+        db = await self._get_db()
+        async with self._tx_lock:
             await db.execute("""
                 UPDATE positions 
                 SET status = 'CLOSED', close_reason = ?, closed_at = ?,
@@ -140,95 +263,83 @@ class Database:
                 WHERE id = ?
             """, (reason, datetime.now().isoformat(), exit_spot, exit_perp, position_id))
             await db.commit()
-            logger.info(f"📤 Closed position #{position_id}: {reason}")
+        logger.info(f"📤 Closed position #{position_id}: {reason}")
     
     async def create_recovery_position(self, coin: str, size: float):
         """Create a recovery position for orphaned exchange positions."""
-        async with aiosqlite.connect(self.db_file) as db:
+        db = await self._get_db()
+        async with self._tx_lock:
             await db.execute("""
                 INSERT INTO positions (coin, size, size_usd, status, close_reason)
                 VALUES (?, ?, 0, 'OPEN', 'RECOVERY_DETECTED')
             """, (coin, size))
             await db.commit()
-            logger.warning(f"🔧 Created recovery position for orphaned {coin}")
+        logger.warning(f"🔧 Created recovery position for orphaned {coin}")
     
     # ==================== Funding Log Methods ====================
     
     async def log_funding_payment(self, coin: str, position_id: int, 
                                    amount: float, rate: float, size: float):
-        """Log a funding payment received."""
-        async with aiosqlite.connect(self.db_file) as db:
-            await db.execute("""
-                INSERT INTO funding_log (coin, position_id, amount_usdc, rate_applied, position_size)
-                VALUES (?, ?, ?, ?, ?)
-            """, (coin, position_id, amount, rate, size))
-            await db.commit()
-            logger.info(f"💰 Funding received: ${amount:.4f} for {coin}")
+        """Log a funding payment received (committed by the batch writer)."""
+        await self._enqueue_write(
+            _SQL_INSERT_FUNDING, (coin, position_id, amount, rate, size)
+        )
+        logger.info(f"💰 Funding received: ${amount:.4f} for {coin}")
     
     async def get_total_funding_earned(self, position_id: Optional[int] = None) -> float:
         """Get total funding earned, optionally for specific position."""
-        async with aiosqlite.connect(self.db_file) as db:
-            if position_id:
-                cursor = await db.execute(
-                    "SELECT SUM(amount_usdc) FROM funding_log WHERE position_id = ?",
-                    (position_id,)
-                )
-            else:
-                cursor = await db.execute("SELECT SUM(amount_usdc) FROM funding_log")
-            result = await cursor.fetchone()
-            return result[0] or 0.0
+        db = await self._get_db()
+        await self.flush()
+        if position_id:
+            cursor = await db.execute(
+                "SELECT SUM(amount_usdc) FROM funding_log WHERE position_id = ?",
+                (position_id,)
+            )
+        else:
+            cursor = await db.execute("SELECT SUM(amount_usdc) FROM funding_log")
+        result = await cursor.fetchone()
+        return result[0] or 0.0
     
     # ==================== Trade Log Methods ====================
     
     async def log_trade(self, position_id: int, coin: str, side: str, 
                         market: str, size: float, price: float, cloid: str = None):
-        """Log a trade execution."""
-        async with aiosqlite.connect(self.db_file) as db:
-            await db.execute("""
-                INSERT INTO trades (position_id, coin, side, market, size, price, cloid)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (position_id, coin, side, market, size, price, cloid))
-            await db.commit()
+        """Log a trade execution (committed by the batch writer)."""
+        await self._enqueue_write(
+            _SQL_INSERT_TRADE, (position_id, coin, side, market, size, price, cloid)
+        )
     
     # ==================== Rebalance Event Methods ====================
     
     async def log_rebalance_event(self, position_id: int, event_type: str,
                                    margin_before: float, margin_after: float,
                                    amount_usd: float = 0, notes: str = ""):
-        """Log a rebalancing event."""
-        async with aiosqlite.connect(self.db_file) as db:
-            await db.execute("""
-                INSERT INTO rebalance_events 
-                (position_id, event_type, margin_ratio_before, margin_ratio_after, amount_usd, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (position_id, event_type, margin_before, margin_after, amount_usd, notes))
-            await db.commit()
-            logger.info(f"🔄 Rebalance event: {event_type} (margin {margin_before:.2%} → {margin_after:.2%})")
+        """Log a rebalancing event (committed by the batch writer)."""
+        await self._enqueue_write(
+            _SQL_INSERT_REBALANCE,
+            (position_id, event_type, margin_before, margin_after, amount_usd, notes)
+        )
+        logger.info(f"🔄 Rebalance event: {event_type} (margin {margin_before:.2%} → {margin_after:.2%})")
     
     # ==================== Stats Methods ====================
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get summary statistics."""
-        async with aiosqlite.connect(self.db_file) as db:
-            # Open positions count
-            cursor = await db.execute("SELECT COUNT(*) FROM positions WHERE status = 'OPEN'")
-            open_count = (await cursor.fetchone())[0]
-            
-            # Total funding earned
-            cursor = await db.execute("SELECT SUM(amount_usdc) FROM funding_log")
-            total_funding = (await cursor.fetchone())[0] or 0
-            
-            # Total trades
-            cursor = await db.execute("SELECT COUNT(*) FROM trades")
-            trade_count = (await cursor.fetchone())[0]
-            
-            # Rebalance events
-            cursor = await db.execute("SELECT COUNT(*) FROM rebalance_events")
-            rebalance_count = (await cursor.fetchone())[0]
-            
-            return {
-                "open_positions": open_count,
-                "total_funding_usd": total_funding,
-                "total_trades": trade_count,
-                "rebalance_events": rebalance_count
-            }
+        db = await self._get_db()
+        await self.flush()
+        # All four counters in one statement
+        cursor = await db.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM positions WHERE status = 'OPEN'),
+                (SELECT COALESCE(SUM(amount_usdc), 0) FROM funding_log),
+                (SELECT COUNT(*) FROM trades),
+                (SELECT COUNT(*) FROM rebalance_events)
+        """)
+        open_count, total_funding, trade_count, rebalance_count = await cursor.fetchone()
+        
+        return {
+            "open_positions": open_count,
+            "total_funding_usd": total_funding,
+            "total_trades": trade_count,
+            "rebalance_events": rebalance_count
+        }
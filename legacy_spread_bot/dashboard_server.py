@@ -10,16 +10,22 @@ Provides a web interface to monitor:
 """
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
+import re
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional, Set
 from dataclasses import dataclass, field, asdict
 import threading
 import time
 
+import aiohttp
 from aiohttp import web
 import aiohttp_cors
+import orjson
 
 import config
 from websocket_manager import WebSocketManager, PriceState
@@ -28,6 +34,16 @@ from trade_events import trade_events
 logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
+HL_INFO_URL = 'https://api.hyperliquid.xyz/info'
+CLIENT_QUEUE_SIZE = 32  # Pending messages before a slow client is dropped
+BROADCAST_INTERVAL = 0.2  # Seconds; caps dashboard updates at ~5 Hz
+PRICE_HISTORY_MAX = 100  # Chart points kept in memory
+TRADE_HISTORY_MAX = 1000  # Trades kept in memory for /api/history
+INDEX_FILE = "./static/index.html"
+STATIC_CACHE_CONTROL = "public, max-age=300"
+VERSIONED_CACHE_CONTROL = "public, max-age=31536000, immutable"  # /static URLs carrying ?v=<hash>
+SNAPSHOT_EVERY = 50  # Broadcasts between full snapshots; others carry only deltas
+
 
 @dataclass
 class TradeRecord:
@@ -84,10 +100,10 @@ class DashboardState:
     last_update: str = ""
     
     # Trade history
-    trade_history: List[Dict] = field(default_factory=list)
+    trade_history: deque = field(default_factory=lambda: deque(maxlen=TRADE_HISTORY_MAX))
     
     # Price history (last 100 points for chart)
-    price_history: List[Dict] = field(default_factory=list)
+    price_history: deque = field(default_factory=lambda: deque(maxlen=PRICE_HISTORY_MAX))
 
 
 class DashboardServer:
@@ -104,16 +120,32 @@ class DashboardServer:
         self.host = host
         self.port = port
         self.state = DashboardState()
-        self.ws_clients: List[web.WebSocketResponse] = []
+        self.ws_clients: Set[web.WebSocketResponse] = set()
+        self._client_queues: Dict[web.WebSocketResponse, asyncio.Queue] = {}
+        self._client_writers: Dict[web.WebSocketResponse, asyncio.Task] = {}
         self.ws_manager: WebSocketManager = None
         self._running = False
-        self._price_history_max = 100
         self._last_position_fetch = 0
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._latest_prices: Optional[PriceState] = None
+        self._dirty = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        self._index_body: bytes = b''
+        self._index_etag = ''
+        self._state: Optional[Dict[str, Any]] = None
+        self._state_cache: bytes = b''
+        self._state_dirty = True
+        self._last_sent_state: Dict[str, Any] = {}
+        self._broadcast_count = 0
+        self._spread_log_cache: tuple = (None, None)  # (mtime, summary)
+    
+    async def _post_info(self, payload: Dict[str, Any]) -> Any:
+        """POST to the Hyperliquid info endpoint over the shared keep-alive session."""
+        async with self._http.post(HL_INFO_URL, json=payload) as resp:
+            return await resp.json()
         
     async def _fetch_positions(self, prices: PriceState):
         """Fetch real positions from Hyperliquid API."""
-        import requests
-        
         now = time.time()
         # Only fetch every 5 seconds to avoid rate limits
         if now - self._last_position_fetch < 5:
@@ -128,17 +160,18 @@ class DashboardServer:
         self._last_position_fetch = now
         
         try:
-            # Fetch perp positions
-            resp = requests.post('https://api.hyperliquid.xyz/info', 
-                json={'type': 'clearinghouseState', 'user': config.ACCOUNT_ADDRESS},
-                timeout=5)
-            perp_data = resp.json()
+            # Fetch perp positions, spot balances and meta concurrently
+            perp_data, spot_data, meta = await asyncio.gather(
+                self._post_info({'type': 'clearinghouseState', 'user': config.ACCOUNT_ADDRESS}),
+                self._post_info({'type': 'spotClearinghouseState', 'user': config.ACCOUNT_ADDRESS}),
+                self._post_info({'type': 'meta'}),
+                return_exceptions=True
+            )
             
-            # Fetch spot balances
-            resp = requests.post('https://api.hyperliquid.xyz/info',
-                json={'type': 'spotClearinghouseState', 'user': config.ACCOUNT_ADDRESS},
-                timeout=5)
-            spot_data = resp.json()
+            # Positions and balances are both required; meta is only for funding
+            for result in (perp_data, spot_data):
+                if isinstance(result, Exception):
+                    raise result
             
             # Check for HYPE perp position
             perp_position = None
@@ -148,12 +181,15 @@ class DashboardServer:
                     perp_position = p
                     break
             
-            # Check for HYPE spot balance
+            # HYPE and USDC spot balances in a single pass
             hype_spot = 0.0
+            usdc_spot = 0.0
             for b in spot_data.get('balances', []):
-                if b.get('coin') == 'HYPE':
-                    hype_spot = float(b.get('total', 0))
-                    break
+                coin = b.get('coin')
+                if coin == 'HYPE':
+                    hype_spot += float(b.get('total', 0))
+                elif coin == 'USDC':
+                    usdc_spot += float(b.get('total', 0))
             
             # Update state
             if perp_position and float(perp_position.get('szi', 0)) != 0:
@@ -189,29 +225,20 @@ class DashboardServer:
             
             # Fetch Account Equity (Total Value)
             perp_equity = float(perp_data.get('marginSummary', {}).get('accountValue', 0))
-            spot_equity = sum(float(b.get('total', 0)) * prices.spot.best_bid 
-                             for b in spot_data.get('balances', []) 
-                             if b.get('coin') == 'HYPE')
-            spot_equity += sum(float(b.get('total', 0)) 
-                              for b in spot_data.get('balances', []) 
-                              if b.get('coin') == 'USDC')
+            spot_equity = hype_spot * prices.spot.best_bid + usdc_spot
             
             self.state.perp_value = perp_equity
             self.state.spot_value = spot_equity
             self.state.account_equity = perp_equity + spot_equity
             
-            # Fetch funding rate
-            try:
-                resp = requests.post('https://api.hyperliquid.xyz/info',
-                    json={'type': 'meta'},
-                    timeout=5)
-                meta = resp.json()
+            # Funding rate
+            if isinstance(meta, Exception):
+                logger.error(f"Funding rate fetch error: {meta}")
+            else:
                 for asset in meta.get('universe', []):
                     if asset.get('name') == 'HYPE':
                         self.state.funding_rate = float(asset.get('funding', 0))
                         break
-            except Exception as e:
-                logger.error(f"Funding rate fetch error: {e}")
                 
         except Exception as e:
             logger.error(f"Position fetch error: {e}")
@@ -226,7 +253,9 @@ class DashboardServer:
         if self.state.entry_spread > config.MIN_SPREAD_THRESHOLD:
             self.state.opportunities_found += 1
         
-        # Add to price history
+        self._state_dirty = True
+        
+        # Add to price history (deque evicts the oldest point itself)
         self.state.price_history.append({
             "time": now,
             "spot": prices.spot.best_ask,
@@ -234,12 +263,8 @@ class DashboardServer:
             "spread": self.state.entry_spread * 100
         })
         
-        # Trim history
-        if len(self.state.price_history) > self._price_history_max:
-            self.state.price_history = self.state.price_history[-self._price_history_max:]
-        
         # Broadcast to WebSocket clients
-        asyncio.create_task(self._broadcast_state())
+        self._broadcast_state()
         
     async def start(self):
         """Start the dashboard server."""
@@ -259,20 +284,35 @@ class DashboardServer:
         app.router.add_get("/api/state", self.handle_get_state)
         app.router.add_get("/api/history", self.handle_get_history)
         app.router.add_get("/ws", self.handle_websocket)
-        app.router.add_static("/static", "./static", show_index=True)
+        static = app.router.add_static("/static", "./static", show_index=True, append_version=True)
+        app.on_response_prepare.append(self._set_static_cache_headers)
+        
+        # Load the index page once, pointing its assets at content-versioned
+        # URLs so they can be cached indefinitely; browsers revalidate the page by ETag
+        with open(INDEX_FILE, 'rb') as f:
+            self._index_body = re.sub(
+                rb'/static/([\w.-]+)',
+                lambda m: str(static.url_for(filename=m.group(1).decode())).encode(),
+                f.read()
+            )
+        self._index_etag = f'"{hashlib.md5(self._index_body).hexdigest()}"'
         
         # Apply CORS to API routes
         for route in list(app.router.routes()):
             if "/api" in str(route.resource):
                 cors.add(route)
         
+        # One HTTP session for all Hyperliquid REST calls (reuses TCP+TLS)
+        self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        
         # Start WebSocket manager for price data
         self.ws_manager = WebSocketManager(on_price_update=self._on_price_update)
         
         self._running = True
         
-        # Start price feed in background
+        # Start price feed and coalesced broadcaster in background
         asyncio.create_task(self._run_price_feed())
+        asyncio.create_task(self._broadcast_loop())
         
         runner = web.AppRunner(app)
         await runner.setup()
@@ -281,9 +321,17 @@ class DashboardServer:
         
         logger.info(f"🖥️  Dashboard running at http://localhost:{self.port}")
         
-        # Keep running
-        while self._running:
-            await asyncio.sleep(1)
+        # Keep running until stop() is called
+        await self._stop_event.wait()
+        
+        await runner.cleanup()
+        await self._http.close()
+    
+    def stop(self):
+        """Stop the dashboard server and its background loops."""
+        self._running = False
+        self._stop_event.set()
+        self._dirty.set()  # Wake the broadcast loop so it can exit
     
     async def _run_price_feed(self):
         """Run the WebSocket price feed."""
@@ -308,28 +356,88 @@ class DashboardServer:
         self.state.last_update = now
         self.state.ws_connected = True
         self.state.bot_running = True
+        self._state_dirty = True
         
-        # Fetch real positions from Hyperliquid every 5 seconds
-        asyncio.create_task(self._fetch_positions(prices))
+        # Hand off to the broadcast loop; ticks between runs are coalesced
+        self._latest_prices = prices
+        self._dirty.set()
     
-    async def _broadcast_state(self):
-        """Broadcast state to all WebSocket clients."""
-        if not self.ws_clients:
+    async def _broadcast_loop(self):
+        """Refresh P&L and broadcast at most once per BROADCAST_INTERVAL."""
+        while self._running:
+            await self._dirty.wait()
+            self._dirty.clear()
+            try:
+                # Fetches real positions from Hyperliquid every 5 seconds
+                await self._fetch_positions(self._latest_prices)
+            except Exception as e:
+                logger.error(f"Broadcast loop error: {e}")
+            await asyncio.sleep(BROADCAST_INTERVAL)
+    
+    def _broadcast_state(self):
+        """Queue the current state for every WebSocket client."""
+        if not self._client_queues:
             return
             
-        state_dict = self._get_state_dict()
-        message = json.dumps(state_dict)
+        state = self._get_state()
+        self._broadcast_count += 1
         
-        dead_clients = []
-        for ws in self.ws_clients:
-            try:
-                await ws.send_str(message)
-            except:
-                dead_clients.append(ws)
+        # Periodic full snapshot so clients resync; otherwise only changed sections
+        if not self._last_sent_state or self._broadcast_count % SNAPSHOT_EVERY == 0:
+            payload = self._get_snapshot_bytes()
+        else:
+            delta = {k: v for k, v in state.items() if v != self._last_sent_state.get(k)}
+            if not delta:
+                return
+            payload = orjson.dumps({"delta": delta})
+        self._last_sent_state = state
         
-        # Remove dead clients
-        for ws in dead_clients:
-            self.ws_clients.remove(ws)
+        # Encoded once; every client gets the same bytes object
+        for ws, queue in list(self._client_queues.items()):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning("Dashboard client too slow, dropping connection")
+                self._drop_client(ws)
+                asyncio.create_task(ws.close())
+    
+    async def _client_writer(self, ws: web.WebSocketResponse, queue: asyncio.Queue):
+        """Drain one client's outbound queue onto its socket."""
+        try:
+            while True:
+                payload = await queue.get()
+                await ws.send_bytes(payload)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self._drop_client(ws)
+    
+    def _drop_client(self, ws: web.WebSocketResponse):
+        """Forget a client and stop its writer task."""
+        self._client_queues.pop(ws, None)
+        writer = self._client_writers.pop(ws, None)
+        if writer and writer is not asyncio.current_task():
+            writer.cancel()
+        self.ws_clients.discard(ws)
+    
+    def _get_state(self) -> Dict[str, Any]:
+        """Get state dict, rebuilding only after a state change."""
+        if self._state_dirty or self._state is None:
+            self._state = self._get_state_dict()
+            self._state_cache = b''
+            self._state_dirty = False
+        return self._state
+    
+    def _get_state_bytes(self) -> bytes:
+        """Get state as encoded JSON, encoding at most once per state change."""
+        state = self._get_state()
+        if not self._state_cache:
+            self._state_cache = orjson.dumps(state)
+        return self._state_cache
+    
+    def _get_snapshot_bytes(self) -> bytes:
+        """Get the full state wrapped as a WebSocket snapshot message."""
+        return b'{"snapshot":' + self._get_state_bytes() + b'}'
     
     def _get_state_dict(self) -> Dict[str, Any]:
         """Get state as dictionary for JSON serialization."""
@@ -385,61 +493,78 @@ class DashboardServer:
         }
     
     def _get_spread_log_summary(self) -> Dict:
-        """Get spread log summary from file."""
-        import os
+        """Get spread log summary from file, re-parsing only when it changes."""
         try:
-            if os.path.exists(config.SPREAD_LOG_FILE):
-                with open(config.SPREAD_LOG_FILE, 'r') as f:
-                    data = json.load(f)
-                    return {
-                        "start_time": data.get("start_time", ""),
-                        "total_checks": data.get("total_checks", 0),
-                        "above_threshold": data.get("above_threshold", 0),
-                        "threshold": data.get("threshold", 0),
-                        "data_points": len(data.get("data", []))
-                    }
+            mtime = os.stat(config.SPREAD_LOG_FILE).st_mtime
+            cached_mtime, cached_summary = self._spread_log_cache
+            if mtime == cached_mtime:
+                return cached_summary
+            
+            with open(config.SPREAD_LOG_FILE, 'r') as f:
+                data = json.load(f)
+            summary = {
+                "start_time": data.get("start_time", ""),
+                "total_checks": data.get("total_checks", 0),
+                "above_threshold": data.get("above_threshold", 0),
+                "threshold": data.get("threshold", 0),
+                "data_points": len(data.get("data", []))
+            }
+            self._spread_log_cache = (mtime, summary)
+            return summary
         except:
             pass
         return {"total_checks": 0, "above_threshold": 0, "data_points": 0}
     
+    @staticmethod
+    async def _set_static_cache_headers(request, response):
+        """Versioned static assets never change under the same URL."""
+        if request.path.startswith("/static/") and "v" in request.query:
+            response.headers['Cache-Control'] = VERSIONED_CACHE_CONTROL
+    
     async def handle_index(self, request):
         """Serve the main dashboard page."""
-        return web.FileResponse("./static/index.html")
+        headers = {'Cache-Control': STATIC_CACHE_CONTROL, 'ETag': self._index_etag}
+        if request.headers.get('If-None-Match') == self._index_etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=self._index_body, content_type='text/html', headers=headers)
     
     async def handle_get_state(self, request):
         """Get current state via REST API."""
-        return web.json_response(self._get_state_dict())
+        return web.Response(body=self._get_state_bytes(), content_type='application/json')
     
     async def handle_get_history(self, request):
         """Get price history for charts."""
-        return web.json_response({
-            "prices": self.state.price_history,
-            "trades": self.state.trade_history
-        })
+        return web.Response(body=orjson.dumps({
+            "prices": list(self.state.price_history),
+            "trades": list(self.state.trade_history)
+        }), content_type='application/json')
     
     async def handle_websocket(self, request):
         """Handle WebSocket connections for real-time updates."""
         ws = web.WebSocketResponse()
         await ws.prepare(request)
         
-        self.ws_clients.append(ws)
-        logger.info(f"Dashboard client connected. Total: {len(self.ws_clients)}")
+        # Send initial snapshot; later broadcasts are deltas against it
+        await ws.send_bytes(self._get_snapshot_bytes())
         
-        # Send initial state
-        await ws.send_str(json.dumps(self._get_state_dict()))
+        # Broadcasts go through a bounded per-client queue and one writer task
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.ws_clients.add(ws)
+        self._client_queues[ws] = queue
+        self._client_writers[ws] = asyncio.create_task(self._client_writer(ws, queue))
+        logger.info(f"Dashboard client connected. Total: {len(self.ws_clients)}")
         
         try:
             async for msg in ws:
                 if msg.type == web.WSMsgType.TEXT:
                     # Handle commands from frontend
-                    data = json.loads(msg.data)
+                    data = orjson.loads(msg.data)
                     if data.get("command") == "ping":
-                        await ws.send_str(json.dumps({"pong": True}))
+                        await ws.send_bytes(orjson.dumps({"pong": True}))
         except:
             pass
         finally:
-            if ws in self.ws_clients:
-                self.ws_clients.remove(ws)
+            self._drop_client(ws)
             logger.info(f"Dashboard client disconnected. Total: {len(self.ws_clients)}")
         
         return ws
@@ -447,6 +572,7 @@ class DashboardServer:
     def add_trade(self, trade: TradeRecord):
         """Add a trade to history."""
         self.state.trade_history.append(asdict(trade))
+        self._state_dirty = True
         if trade.action == "EXIT":
             self.state.total_pnl += trade.pnl
             self.state.trades_executed += 1
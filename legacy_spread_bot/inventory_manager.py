@@ -5,16 +5,32 @@ Tracks position size, calculates inventory skew factors,
 and manages delta hedging via perpetual contracts.
 """
 
+import asyncio
 import logging
+import math
 import time
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
-import requests
+import httpx
+import orjson
 
 import config
+from utils.async_hl import AsyncHLClient
 
 logger = logging.getLogger(__name__)
 
+HL_INFO_URL = 'https://api.hyperliquid.xyz/info'
+JSON_HEADERS = {'content-type': 'application/json'}
+
+# Hedge order constants: IOC with 0.2% slippage
+_IOC_ORDER_TYPE = {"limit": {"tif": "Ioc"}}
+_SLIP_UP = 1.002
+_SLIP_DN = 0.998
+
+# Side signs for capacity checks
+SIDE_BUY = 1
+SIDE_SELL = -1
+
 
 @dataclass
 class InventoryState:
@@ -25,6 +41,7 @@ class InventoryState:
     perp_value_usd: float = 0.0    # Perp value in USD
     net_delta: float = 0.0         # Net exposure (spot + perp)
     last_update: float = 0.0
+    stale: bool = False            # True once syncs have failed past the hard TTL
 
 
 class InventoryManager:
@@ -38,9 +55,11 @@ class InventoryManager:
     4. Execute hedges when inventory exceeds threshold
     """
     
-    def __init__(self, exchange, info):
+    def __init__(self, exchange, info, hl: Optional[AsyncHLClient] = None):
         self.exchange = exchange
         self.info = info
+        # Share the order manager's client so hedges and quotes draw nonces from one counter
+        self.hl = hl or AsyncHLClient(exchange)
         self.state = InventoryState()
         
         # Config
@@ -48,51 +67,205 @@ class InventoryManager:
         self.skew_factor = getattr(config, 'MM_SKEW_FACTOR', 0.5)
         self.hedge_threshold = getattr(config, 'MM_HEDGE_THRESHOLD_USD', 300)
         
+        # Skew constants: at max inventory, skew is MM_SPREAD_BPS * skew_factor
+        self._max_skew_bps = getattr(config, 'MM_SPREAD_BPS', 8) * self.skew_factor
+        self._inv_max_inventory = 1.0 / self.max_inventory_usd if self.max_inventory_usd else 0.0
+        self._hedge_threshold_sq = self.hedge_threshold * self.hedge_threshold
+        
         # Cache
-        self._last_sync = 0
-        self._sync_interval = 5  # Sync every 5 seconds
+        self._last_sync = float('-inf')  # time.monotonic() of the last sync
+        self._soft_ttl = 5   # Older than this: serve cached state, refresh in background
+        self._hard_ttl = 30  # Older than this: block on a fresh sync
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._generation = 0  # Bumped whenever state is invalidated or superseded
+        
+        # Per-tick freshness token: repeat calls within one tick skip the TTL checks
+        self._current_tick: Optional[int] = None
+        self._last_tick_synced: Optional[int] = None
+        
+        # Push updates from the WebSocket user stream; REST is only a fallback
+        self._last_ws_msg = float('-inf')
+        self._ws_stale_after = 30  # Seconds without user events before polling REST
+        self._last_price = 0.0
+        
+        # Circuit breaker: back off REST syncs exponentially after failures
+        self._fail_count = 0
+        self._next_attempt = 0.0  # time.monotonic() before which syncs are skipped
+        
+        # Info request bodies depend only on the (static) account address
+        self._info_url = HL_INFO_URL
+        self._spot_body = orjson.dumps({'type': 'spotClearinghouseState', 'user': config.ACCOUNT_ADDRESS})
+        self._perp_body = orjson.dumps({'type': 'clearinghouseState', 'user': config.ACCOUNT_ADDRESS})
+        
+        # Pooled keep-alive client; avoids a TCP+TLS handshake per sync
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=30),
+            timeout=5.0
+        )
         
         logger.info(f"InventoryManager initialized: max=${self.max_inventory_usd}, hedge@${self.hedge_threshold}")
     
-    def sync_state(self, current_price: float) -> InventoryState:
+    async def close(self):
+        """Close the pooled HTTP client."""
+        await self._http.aclose()
+    
+    def on_user_update(self, msg: Dict[str, Any]):
         """
-        Sync inventory state with exchange.
+        Apply a webData2 or userFills WebSocket message to the inventory state.
         
         Args:
-            current_price: Current HYPE price for value calculation
+            msg: Raw WebSocket message with 'channel' and 'data'
         """
-        now = time.time()
-        
-        # Rate limit syncs
-        if now - self._last_sync < self._sync_interval:
-            return self.state
+        channel = msg.get('channel')
+        data = msg.get('data', {})
+        now = time.monotonic()
         
-        try:
-            # Get spot balance
-            spot_state = requests.post(
-                'https://api.hyperliquid.xyz/info',
-                json={'type': 'spotClearinghouseState', 'user': config.ACCOUNT_ADDRESS},
-                timeout=5
-            ).json()
-            
-            spot_balance = 0.0
+        if channel == 'webData2':
+            spot_state = data.get('spotState') or {}
             for balance in spot_state.get('balances', []):
                 if balance.get('coin') == 'HYPE':
-                    spot_balance = float(balance.get('total', 0))
+                    self.state.spot_balance = float(balance.get('total', 0))
                     break
             
-            # Get perp position
-            perp_state = requests.post(
-                'https://api.hyperliquid.xyz/info',
-                json={'type': 'clearinghouseState', 'user': config.ACCOUNT_ADDRESS},
-                timeout=5
-            ).json()
-            
-            perp_position = 0.0
+            perp_state = data.get('clearinghouseState') or {}
+            self.state.perp_position = 0.0
             for pos in perp_state.get('assetPositions', []):
                 if pos.get('position', {}).get('coin') == config.PERP_SYMBOL:
-                    perp_position = float(pos['position'].get('szi', 0))
+                    self.state.perp_position = float(pos['position'].get('szi', 0))
                     break
+        
+        elif channel == 'userFills':
+            # The first message replays history; balances come from webData2
+            if data.get('isSnapshot'):
+                return
+            for fill in data.get('fills', []):
+                sz = float(fill.get('sz', 0))
+                signed = sz if fill.get('side') == 'B' else -sz
+                if fill.get('coin') == config.SPOT_SYMBOL:
+                    self.state.spot_balance += signed
+                elif fill.get('coin') == config.PERP_SYMBOL:
+                    self.state.perp_position += signed
+        else:
+            return
+        
+        self._revalue(self._last_price)
+        self.state.stale = False
+        self._last_ws_msg = now
+        self._last_sync = now
+        self._generation += 1  # Any REST sync already in flight is older than this
+    
+    def _invalidate(self):
+        """Force a fresh sync and discard any refresh started before now."""
+        self._generation += 1
+        self._last_sync = float('-inf')
+        self._last_tick_synced = None
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+    
+    def _revalue(self, current_price: float):
+        """Recompute USD values of the current balances in place."""
+        self.state.spot_value_usd = self.state.spot_balance * current_price
+        self.state.perp_value_usd = self.state.perp_position * current_price
+        self.state.net_delta = (self.state.spot_balance + self.state.perp_position) * current_price
+        self.state.last_update = time.time()
+    
+    def begin_tick(self, tick_id: int):
+        """Bind the current quote tick; later sync_state calls in it are free."""
+        self._current_tick = tick_id
+    
+    def _skip_if_fresh(self) -> bool:
+        """True if state was already synced during the current tick."""
+        return self._current_tick is not None and self._last_tick_synced == self._current_tick
+    
+    async def sync_state(self, current_price: float) -> InventoryState:
+        """
+        Get inventory state, syncing with the exchange when it is stale.
+        
+        Serves cached state while it is younger than the soft TTL, schedules a
+        background refresh between the soft and hard TTL, and only waits on
+        the exchange once the state is older than the hard TTL.
+        
+        Args:
+            current_price: Current HYPE price for value calculation
+        """
+        if self._skip_if_fresh():
+            return self.state
+        self._last_tick_synced = self._current_tick
+        
+        # Fresh user-stream data: just revalue at the current price
+        now = time.monotonic()
+        if now - self._last_ws_msg < self._ws_stale_after:
+            if current_price != self._last_price:
+                self._last_price = current_price
+                self._revalue(current_price)
+            return self.state
+        
+        age = now - self._last_sync
+        if age < self._soft_ttl:
+            return self.state
+        
+        # Backing off after failures: keep serving (stale-flagged) state
+        if now < self._next_attempt:
+            if age >= self._hard_ttl:
+                self.state.stale = True
+            return self.state
+        
+        refreshing = self._refresh_task is not None and not self._refresh_task.done()
+        if age < self._hard_ttl:
+            if not refreshing:
+                self._refresh_task = asyncio.create_task(self._do_sync(current_price))
+            return self.state
+        
+        if refreshing:
+            task = self._refresh_task
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # We were cancelled, not the refresh
+            if not task.cancelled():
+                return self.state
+            # Refresh was invalidated mid-flight (hedge): sync fresh below
+        return await self._do_sync(current_price)
+    
+    async def _do_sync(self, current_price: float) -> InventoryState:
+        """
+        Fetch spot and perp inventory from the exchange.
+        
+        Args:
+            current_price: Current HYPE price for value calculation
+        """
+        now = time.monotonic()
+        generation = self._generation
+        self._last_price = current_price
+        
+        try:
+            # Get spot balance and perp position concurrently
+            spot_resp, perp_resp = await asyncio.gather(
+                self._http.post(self._info_url, content=self._spot_body, headers=JSON_HEADERS),
+                self._http.post(self._info_url, content=self._perp_body, headers=JSON_HEADERS)
+            )
+            if generation != self._generation:
+                # State was invalidated (e.g. a hedge) while this request was in flight
+                logger.debug("Discarding inventory sync started before the last invalidation")
+                return self.state
+            
+            spot_state = orjson.loads(spot_resp.content)
+            perp_state = orjson.loads(perp_resp.content)
+            
+            spot_balance = float(next(
+                (b.get('total', 0) for b in spot_state.get('balances', ()) if b.get('coin') == 'HYPE'),
+                0
+            ))
+            
+            target = config.PERP_SYMBOL
+            positions = (p.get('position', {}) for p in perp_state.get('assetPositions', ()))
+            perp_position = float(next(
+                (pos.get('szi', 0) for pos in positions if pos.get('coin') == target),
+                0
+            ))
             
             # Update state
             self.state = InventoryState(
@@ -101,19 +274,27 @@ class InventoryManager:
                 perp_position=perp_position,
                 perp_value_usd=perp_position * current_price,
                 net_delta=(spot_balance + perp_position) * current_price,
-                last_update=now
+                last_update=time.time()
             )
             
             self._last_sync = now
+            self._fail_count = 0
+            self._next_attempt = 0.0
             
             logger.debug(f"Inventory synced: spot={spot_balance:.2f} HYPE, perp={perp_position:.2f}, net_delta=${self.state.net_delta:.2f}")
             
         except Exception as e:
-            logger.warning(f"Inventory sync failed: {e}")
+            self._fail_count += 1
+            backoff = min(60, 2 ** self._fail_count)
+            self._next_attempt = time.monotonic() + backoff
+            # A failed refresh of recent state isn't stale yet; only past the hard TTL
+            if time.monotonic() - self._last_sync >= self._hard_ttl:
+                self.state.stale = True
+            logger.warning(f"Inventory sync failed ({self._fail_count}x), retrying in {backoff}s: {e}")
         
         return self.state
     
-    def get_skew_bps(self, current_price: float) -> float:
+    async def get_skew_bps(self, current_price: float) -> float:
         """
         Calculate quote skew in basis points based on inventory.
         
@@ -126,23 +307,13 @@ class InventoryManager:
         Returns:
             Skew in basis points to apply to quotes
         """
-        self.sync_state(current_price)
-        
-        if self.max_inventory_usd == 0:
-            return 0.0
-        
-        # Calculate inventory ratio (-1 to +1)
-        inventory_ratio = self.state.net_delta / self.max_inventory_usd
-        inventory_ratio = max(-1.0, min(1.0, inventory_ratio))  # Clamp
-        
-        # Convert to basis points with skew factor
-        # At max inventory, skew is MM_SPREAD_BPS * skew_factor
-        max_skew = getattr(config, 'MM_SPREAD_BPS', 8) * self.skew_factor
-        skew_bps = inventory_ratio * max_skew
+        await self.sync_state(current_price)
         
-        return skew_bps
+        # Inventory ratio clamped to -1..+1 (0 when max inventory is unset)
+        ratio = self.state.net_delta * self._inv_max_inventory
+        return math.copysign(min(abs(ratio), 1.0), ratio) * self._max_skew_bps
     
-    def should_hedge(self, current_price: float) -> bool:
+    async def should_hedge(self, current_price: float) -> bool:
         """
         Check if inventory exceeds hedge threshold.
         
@@ -152,10 +323,11 @@ class InventoryManager:
         Returns:
             True if hedging is needed
         """
-        self.sync_state(current_price)
+        await self.sync_state(current_price)
         
-        # Only hedge spot inventory that exceeds threshold
-        return abs(self.state.spot_value_usd) > self.hedge_threshold
+        # Only hedge spot inventory that exceeds threshold (squared: no abs())
+        v = self.state.spot_value_usd
+        return v * v > self._hedge_threshold_sq
     
     async def execute_hedge(self, current_price: float) -> bool:
         """
@@ -170,9 +342,10 @@ class InventoryManager:
         Returns:
             True if hedge was executed successfully
         """
-        self.sync_state(current_price)
+        await self.sync_state(current_price)
         
-        if not self.should_hedge(current_price):
+        v = self.state.spot_value_usd
+        if v * v <= self._hedge_threshold_sq:
             logger.debug("No hedge needed")
             return False
         
@@ -194,30 +367,20 @@ class InventoryManager:
             return False
         
         try:
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
             # Place hedge order with aggresive pricing
-            slippage = 0.002  # 0.2% slippage
-            if is_buy:
-                price = round(current_price * (1 + slippage), 5)
-            else:
-                price = round(current_price * (1 - slippage), 5)
+            price = round(current_price * (_SLIP_UP if is_buy else _SLIP_DN), 5)
             
-            def place_hedge():
-                return self.exchange.order(
-                    name=config.PERP_SYMBOL,
-                    is_buy=is_buy,
-                    sz=hedge_size,
-                    limit_px=price,
-                    order_type={"limit": {"tif": "Ioc"}}
-                )
-            
-            result = await loop.run_in_executor(None, place_hedge)
+            result = await self.hl.order(
+                config.PERP_SYMBOL,
+                is_buy=is_buy,
+                sz=hedge_size,
+                limit_px=price,
+                order_type=_IOC_ORDER_TYPE
+            )
             
             if result.get("status") == "ok":
                 logger.info(f"✅ Hedge executed: {hedge_size:.2f} HYPE perp")
-                self._last_sync = 0  # Force resync
+                self._invalidate()  # Force resync; pre-hedge refreshes must not land
                 return True
             else:
                 logger.warning(f"Hedge failed: {result}")
@@ -227,38 +390,32 @@ class InventoryManager:
             logger.error(f"Hedge error: {e}")
             return False
     
-    def get_remaining_capacity(self, current_price: float, side: str) -> float:
+    def get_remaining_capacity(self, current_price: float, sign: int) -> float:
         """
-        Get remaining capacity for a given side.
+        Get remaining capacity for a given side from cached inventory.
         
         Args:
             current_price: Current HYPE price
-            side: 'buy' or 'sell'
+            sign: SIDE_BUY (+1) or SIDE_SELL (-1)
             
         Returns:
             Remaining capacity in HYPE
         """
-        self.sync_state(current_price)
-        
-        if side == 'buy':
-            # How much more can we buy?
-            remaining_usd = self.max_inventory_usd - self.state.spot_value_usd
-        else:
-            # How much can we sell?
-            remaining_usd = self.max_inventory_usd + self.state.spot_value_usd
-        
-        remaining_hype = max(0, remaining_usd / current_price)
-        return remaining_hype
+        # Buy: room below max inventory; sell: room above -max inventory
+        remaining_usd = self.max_inventory_usd - sign * self.state.spot_value_usd
+        return max(0.0, remaining_usd) / current_price
     
-    def is_at_limit(self, current_price: float, side: str) -> bool:
+    def is_at_limit(self, current_price: float, sign: int) -> bool:
         """
         Check if we're at inventory limit for a side.
         
         Args:
             current_price: Current HYPE price
-            side: 'buy' or 'sell'
+            sign: SIDE_BUY (+1) or SIDE_SELL (-1)
             
         Returns:
             True if at limit
         """
-        return self.get_remaining_capacity(current_price, side) < 1.0  # Less than 1 HYPE
+        # Less than 1 HYPE of room, compared in USD to skip the division
+        remaining_usd = self.max_inventory_usd - sign * self.state.spot_value_usd
+        return max(0.0, remaining_usd) < current_price
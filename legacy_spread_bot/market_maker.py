@@ -9,27 +9,59 @@ A professional market making engine that:
 """
 
 import asyncio
+import itertools
 import logging
+import queue
 import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from datetime import datetime
 
+from hyperliquid.api import API
 from hyperliquid.info import Info
 from hyperliquid.exchange import Exchange
 from hyperliquid.utils import constants
 from eth_account import Account
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import config
 from websocket_manager import WebSocketManager, PriceState
 from inventory_manager import InventoryManager
 from order_manager import OrderManager
+from utils.async_hl import AsyncHLClient
 
+# Records are queued and written by a listener thread, so a slow terminal
+# or pipe never blocks the quoting loop
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[QueueHandler(_log_queue)]
 )
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
+STATUS_INTERVAL = 60  # Seconds between status log lines
+
+
+def build_http_session() -> requests.Session:
+    """
+    Build a pooled keep-alive session for the synchronous SDK calls.
+    
+    Retries only idempotent requests on gateway errors; POSTs (orders)
+    are never replayed.
+    """
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=100,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    ))
+    return session
+
 
 class MarketMaker:
     """
@@ -51,15 +83,19 @@ class MarketMaker:
         # SDK setup with retry
         self.account = Account.from_key(config.PRIVATE_KEY)
         
+        # One pooled session shared by every SDK client, built once and used
+        # from the very first request
+        self.http_session = build_http_session()
+        api = API(constants.MAINNET_API_URL)
+        api.session = self.http_session
+        
+        # Fetch the universes once; with them passed in, constructing Info and
+        # Exchange makes no requests of its own
         max_retries = 5
         for i in range(max_retries):
             try:
-                self.info = Info(constants.MAINNET_API_URL, skip_ws=True)
-                self.exchange = Exchange(
-                    self.account,
-                    constants.MAINNET_API_URL,
-                    account_address=config.ACCOUNT_ADDRESS
-                )
+                meta = api.post("/info", {"type": "meta"})
+                spot_meta = api.post("/info", {"type": "spotMeta"})
                 break
             except Exception as e:
                 logger.warning(f"Init attempt {i+1}/{max_retries} failed: {e}")
@@ -67,16 +103,43 @@ class MarketMaker:
                     raise
                 time.sleep(5)
         
-        # Managers
-        self.inventory_mgr = InventoryManager(self.exchange, self.info)
-        self.order_mgr = OrderManager(self.exchange, self.info)
+        self.info = Info(constants.MAINNET_API_URL, skip_ws=True, meta=meta, spot_meta=spot_meta)
+        self.exchange = Exchange(
+            self.account,
+            constants.MAINNET_API_URL,
+            meta=meta,
+            account_address=config.ACCOUNT_ADDRESS,
+            spot_meta=spot_meta
+        )
+        
+        # The SDK's API base class creates its own requests.Session; swap in ours
+        for client in (self.info, self.exchange, getattr(self.exchange, 'info', None)):
+            if client is not None and hasattr(client, 'session'):
+                client.session = self.http_session
+        
+        # Managers; one AsyncHLClient so every signed action shares its nonce counter
+        self.hl = AsyncHLClient(self.exchange)
+        self.inventory_mgr = InventoryManager(self.exchange, self.info, self.hl)
+        self.order_mgr = OrderManager(self.exchange, self.info, self.hl)
         
         # WebSocket
         self.ws_manager: Optional[WebSocketManager] = None
         
         # State
         self.running = False
-        self.last_quote_update = 0
+        self.last_quote_update = float('-inf')  # time.monotonic() of the last quote
+        self._tick = 0
+        self._quotes_pulled = False  # Resting quotes cancelled while inventory is stale
+        self._status_handle: Optional[asyncio.TimerHandle] = None
+        
+        # Latest-tick handoff from the WebSocket to the quote worker
+        self._tick_event = asyncio.Event()
+        self._latest_prices: Optional[PriceState] = None
+        self._quote_task: Optional[asyncio.Task] = None
+        
+        # Quote update counter; copied into self.stats only when reported
+        self._update_counter = itertools.count(1)
+        self._quote_updates = 0
         self.quote_refresh_interval = getattr(config, 'MM_REFRESH_SECONDS', 2)
         
         # Stats
@@ -100,20 +163,37 @@ class MarketMaker:
         logger.info(f"DRY RUN: {getattr(config, 'DRY_RUN', False)}")
         logger.info("=" * 60)
     
-    async def on_price_update(self, prices: PriceState) -> None:
+    def on_price_update(self, prices: PriceState) -> None:
         """
         Handle price updates from WebSocket.
         
+        Only records the latest prices; the quote worker picks up the most
+        recent snapshot, so bursts of ticks collapse into one quote update.
+        """
+        self._latest_prices = prices
+        self._tick_event.set()
+    
+    async def _quote_worker(self):
+        """Quote off the most recent prices, at most once per refresh interval."""
+        while self.running:
+            await self._tick_event.wait()
+            self._tick_event.clear()
+            try:
+                await self._handle_tick(self._latest_prices)
+            except Exception as e:
+                logger.error(f"Quote worker error: {e}")
+            await asyncio.sleep(self.quote_refresh_interval)
+    
+    async def _handle_tick(self, prices: PriceState) -> None:
+        """
+        Run one quoting cycle.
+        
         This is the main loop that:
         1. Calculates fair price
         2. Gets inventory skew
         3. Updates quote grid
         """
-        now = time.time()
-        
-        # Rate limit quote updates
-        if now - self.last_quote_update < self.quote_refresh_interval:
-            return
+        now = time.monotonic()
         
         # Calculate fair price (mid-price)
         fair_price = (prices.spot.best_bid + prices.spot.best_ask) / 2
@@ -121,37 +201,63 @@ class MarketMaker:
         if fair_price <= 0:
             return
         
+        # One inventory sync per tick, however many checks read it
+        self._tick += 1
+        self.inventory_mgr.begin_tick(self._tick)
+        
         # Get inventory skew
-        skew_bps = self.inventory_mgr.get_skew_bps(fair_price)
+        skew_bps = await self.inventory_mgr.get_skew_bps(fair_price)
+        
+        # Don't quote or hedge off inventory we couldn't refresh, and don't
+        # leave the last grid resting on the book while paused
+        if self.inventory_mgr.state.stale:
+            if not self._quotes_pulled:
+                logger.warning("⚠️ Inventory stale, pulling quotes until sync recovers")
+                self._quotes_pulled = await self.order_mgr.cancel_all()
+            return
+        self._quotes_pulled = False
         
         # Log periodically
-        self.stats['quote_updates'] += 1
-        if self.stats['quote_updates'] % 30 == 0:  # Every 30 updates (~1 min)
+        n = self._quote_updates = next(self._update_counter)
+        if n % 30 == 0 and logger.isEnabledFor(logging.INFO):  # Every 30 updates (~1 min)
             self._log_status(prices, fair_price, skew_bps)
         
-        # Check if we need to hedge
-        if self.inventory_mgr.should_hedge(fair_price):
-            await self.inventory_mgr.execute_hedge(fair_price)
+        # Update quote grid, hedging concurrently if needed
+        tasks = [self.order_mgr.place_grid(fair_price, skew_bps)]
+        if await self.inventory_mgr.should_hedge(fair_price):
+            tasks.append(self.inventory_mgr.execute_hedge(fair_price))
         
-        # Update quote grid
-        try:
-            await self.order_mgr.place_grid(fair_price, skew_bps)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if isinstance(results[0], Exception):
+            logger.error(f"Quote update failed: {results[0]}")
+        else:
             self.last_quote_update = now
-        except Exception as e:
-            logger.error(f"Quote update failed: {e}")
+        if len(results) > 1 and isinstance(results[1], Exception):
+            logger.error(f"Hedge failed: {results[1]}")
     
     def _log_status(self, prices: PriceState, fair_price: float, skew_bps: float):
         """Log current status."""
+        self.stats['quote_updates'] = self._quote_updates
         inv = self.inventory_mgr.state
         spread = prices.get_entry_spread() * 10000  # Convert to bps
         
+        # %-style args: formatted only if the record is actually emitted
+        logger.info(
+            "📊 Fair: $%.4f | Spread: %.1fbps | Skew: %+.1fbps | Inv: $%.0f | Updates: %d",
+            fair_price, spread, skew_bps, inv.net_delta, self.stats['quote_updates']
+        )
+    
+    def _log_status_periodic(self):
+        """Log a status line and reschedule itself on the event loop timer."""
+        if not self.running:
+            return
+        self.stats['quote_updates'] = self._quote_updates
         logger.info(
-            f"📊 Fair: ${fair_price:.4f} | "
-            f"Spread: {spread:.1f}bps | "
-            f"Skew: {skew_bps:+.1f}bps | "
-            f"Inv: ${inv.net_delta:.0f} | "
-            f"Updates: {self.stats['quote_updates']}"
+            "⏱️ Status: %d updates, %d orders",
+            self.stats['quote_updates'], self.order_mgr.get_active_order_count()
         )
+        self._status_handle = asyncio.get_running_loop().call_later(STATUS_INTERVAL, self._log_status_periodic)
     
     async def run(self):
         """Run the market maker."""
@@ -161,7 +267,8 @@ class MarketMaker:
         
         # Setup WebSocket
         self.ws_manager = WebSocketManager(
-            on_price_update=lambda p: asyncio.create_task(self.on_price_update(p))
+            on_price_update=self.on_price_update,
+            on_user_update=self.inventory_mgr.on_user_update
         )
         
         # Test connection
@@ -170,14 +277,13 @@ class MarketMaker:
             return
         
         try:
-            # Status loop
-            async def status_loop():
-                while self.running:
-                    await asyncio.sleep(60)  # Every minute
-                    logger.info(f"⏱️ Status: {self.stats['quote_updates']} updates, {self.order_mgr.get_active_order_count()} orders")
+            # Single quote worker fed by on_price_update
+            self._quote_task = asyncio.create_task(self._quote_worker())
             
-            # Start background tasks
-            status_task = asyncio.create_task(status_loop())
+            # Periodic status via a timer chain (no long-lived coroutine)
+            self._status_handle = asyncio.get_running_loop().call_later(
+                STATUS_INTERVAL, self._log_status_periodic
+            )
             
             # Connect to WebSocket (blocks until disconnect)
             await self.ws_manager.connect()
@@ -194,6 +300,16 @@ class MarketMaker:
         logger.info("🛑 Shutting down market maker...")
         
         self.running = False
+        self.stats['quote_updates'] = self._quote_updates
+        
+        if self._status_handle:
+            self._status_handle.cancel()
+            self._status_handle = None
+        
+        if self._quote_task:
+            self._quote_task.cancel()
+            await asyncio.gather(self._quote_task, return_exceptions=True)
+            self._quote_task = None
         
         # Cancel all orders
         try:
@@ -206,6 +322,9 @@ class MarketMaker:
         if self.ws_manager:
             await self.ws_manager.disconnect()
         
+        await self.inventory_mgr.close()
+        await self.hl.close()
+        
         # Print final stats
         self._print_summary()
     
@@ -240,4 +359,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        _log_listener.stop()  # Flush anything still queued
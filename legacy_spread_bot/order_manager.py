@@ -5,14 +5,15 @@ Manages grid orders, tracks open orders, and handles
 order placement/cancellation with POST_ONLY mode for rebates.
 """
 
+import asyncio
 import logging
 import time
-import asyncio
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from enum import Enum
 
 import config
+from utils.async_hl import AsyncHLClient
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ class OrderSide(Enum):
     ASK = "ask"
 
 
-@dataclass
+@dataclass(slots=True)
 class QuoteLevel:
     """A single quote level in the grid."""
     side: OrderSide
@@ -33,7 +34,7 @@ class QuoteLevel:
     placed_at: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class GridState:
     """Current state of the order grid."""
     bids: List[QuoteLevel] = field(default_factory=list)
@@ -53,9 +54,10 @@ class OrderManager:
     - Order tracking and management
     """
     
-    def __init__(self, exchange, info):
+    def __init__(self, exchange, info, hl: Optional[AsyncHLClient] = None):
         self.exchange = exchange
         self.info = info
+        self.hl = hl or AsyncHLClient(exchange)
         self.grid = GridState()
         
         # Config
@@ -84,40 +86,34 @@ class OrderManager:
         """
         grid = GridState(fair_price=fair_price, last_update=time.time())
         
-        base_spread_bps = self.spread_bps
+        # Per-grid constants in price units, so each level is one multiply-add per side
+        step = fair_price * self.spread_bps / 10000
+        # Positive skew = shift quotes down (we want to sell)
+        skewed_mid = fair_price - fair_price * skew_bps / 10000
+        base_size = self.quote_size_usd / fair_price
         
         for level in range(1, self.num_levels + 1):
-            # Spread increases with each level
-            level_spread_bps = base_spread_bps * level
+            # Size decreases with level (more at tight spreads)
+            level_size = round(base_size / level, 2)
+            if level_size < 0.1:  # Min size; every further level is smaller still
+                break
             
-            # Apply skew
-            # Positive skew = shift quotes up (we want to sell)
-            bid_spread = level_spread_bps + skew_bps
-            ask_spread = level_spread_bps - skew_bps
+            # Spread increases with each level
+            offset = step * level
             
-            # Calculate prices
-            bid_price = fair_price * (1 - bid_spread / 10000)
-            ask_price = fair_price * (1 + ask_spread / 10000)
+            grid.bids.append(QuoteLevel(
+                side=OrderSide.BID,
+                price=round(skewed_mid - offset, 5),
+                size=level_size,
+                level=level
+            ))
             
-            # Size decreases with level (more at tight spreads)
-            size_multiplier = 1.0 / level
-            base_size = self.quote_size_usd / fair_price
-            level_size = round(base_size * size_multiplier, 2)
-            
-            if level_size >= 0.1:  # Min size
-                grid.bids.append(QuoteLevel(
-                    side=OrderSide.BID,
-                    price=round(bid_price, 5),
-                    size=level_size,
-                    level=level
-                ))
-                
-                grid.asks.append(QuoteLevel(
-                    side=OrderSide.ASK,
-                    price=round(ask_price, 5),
-                    size=level_size,
-                    level=level
-                ))
+            grid.asks.append(QuoteLevel(
+                side=OrderSide.ASK,
+                price=round(skewed_mid + offset, 5),
+                size=level_size,
+                level=level
+            ))
         
         return grid
     
@@ -125,6 +121,10 @@ class OrderManager:
         """
         Place/update the entire order grid.
         
+        Levels whose rounded price and size are unchanged keep their resting
+        order (and its queue priority); only the levels that moved are
+        cancelled and replaced.
+        
         Args:
             fair_price: Current fair price
             skew_bps: Inventory skew in basis points
@@ -132,13 +132,11 @@ class OrderManager:
         Returns:
             True if grid was placed successfully
         """
-        # Cancel existing orders first
-        await self.cancel_all()
-        
         # Calculate new grid
         new_grid = self.calculate_grid_prices(fair_price, skew_bps)
         
         if getattr(config, 'DRY_RUN', False):
+            await self.cancel_all()
             logger.info(f"DRY RUN - Would place grid:")
             for bid in new_grid.bids:
                 logger.info(f"  BID L{bid.level}: {bid.size:.2f} @ ${bid.price:.4f}")
@@ -147,81 +145,134 @@ class OrderManager:
             self.grid = new_grid
             return True
         
-        # Place all orders
-        orders_to_place = []
-        
-        for bid in new_grid.bids:
-            orders_to_place.append((bid, True))  # is_buy = True
-        
-        for ask in new_grid.asks:
-            orders_to_place.append((ask, False))  # is_buy = False
+        # The exchange is the source of truth for what is still resting
+        try:
+            open_orders = await self.hl.open_orders(config.ACCOUNT_ADDRESS)
+        except Exception as e:
+            logger.error(f"Open orders fetch failed: {e}")
+            return False
+        live_oids = {
+            str(o["oid"]) for o in open_orders
+            if o.get("coin") == config.SPOT_SYMBOL and o.get("oid")
+        }
         
-        # Place orders concurrently
-        loop = asyncio.get_event_loop()
-        tasks = []
+        # Unchanged resting levels are carried over, moved ones are amended in
+        # place; only levels with no resting order are placed fresh
+        resting = {
+            (q.side, q.level): q for q in self.grid.bids + self.grid.asks
+            if q.order_id in live_oids
+        }
+        kept = set()
+        modifies = []  # (resting oid, new quote)
+        quotes = []
+        for levels in (new_grid.bids, new_grid.asks):
+            for i, quote in enumerate(levels):
+                old = resting.get((quote.side, quote.level))
+                if old is None:
+                    quotes.append(quote)
+                elif old.price == quote.price and old.size == quote.size:
+                    levels[i] = old
+                    kept.add(old.order_id)
+                else:
+                    modifies.append((old.order_id, quote))
         
-        for quote, is_buy in orders_to_place:
-            task = loop.run_in_executor(None, self._place_order_sync, quote, is_buy)
-            tasks.append((quote, task))
+        # Resting orders that are neither kept nor amended (dropped levels, strays) get cancelled
+        amended = {oid for oid, _ in modifies}
+        to_cancel = [int(oid) for oid in live_oids - kept - amended]
+        self._active_orders = {oid: q for oid, q in self._active_orders.items() if oid in kept}
         
-        # Wait for all orders
-        success_count = 0
-        for quote, task in tasks:
+        if to_cancel:
             try:
-                result = await task
-                if self._check_order_result(result, quote):
-                    success_count += 1
+                await self._bulk_cancel(to_cancel)
+                self._last_cancel_all = time.time()
             except Exception as e:
-                logger.warning(f"Order placement failed: {e}")
+                logger.error(f"Cancel failed: {e}")
+        
+        # Amends and new placements each go out as one signed action, concurrently
+        order_type = {"limit": {"tif": "Alo"}} if self.post_only else {"limit": {"tif": "Gtc"}}
+        submissions = []
+        if modifies:
+            submissions.append(self._submit(
+                self.hl.bulk_modify([
+                    {"oid": int(oid), "order": self._order_request(quote, order_type)}
+                    for oid, quote in modifies
+                ]),
+                [quote for _, quote in modifies]
+            ))
+        if quotes:
+            submissions.append(self._submit(
+                self.hl.bulk_orders([self._order_request(quote, order_type) for quote in quotes]),
+                quotes
+            ))
         
-        logger.info(f"📊 Grid placed: {success_count}/{len(orders_to_place)} orders successful")
+        if submissions:
+            success_count = sum(await asyncio.gather(*submissions))
+            logger.info(
+                f"📊 Grid updated: {success_count}/{len(modifies) + len(quotes)} orders successful "
+                f"({len(modifies)} amended, {len(quotes)} new), {len(kept)} kept"
+            )
+        else:
+            success_count = 0
         
         self.grid = new_grid
-        return success_count > 0
+        return success_count + len(kept) > 0
     
-    def _place_order_sync(self, quote: QuoteLevel, is_buy: bool) -> Dict:
-        """Place a single order synchronously."""
-        order_type = {"limit": {"tif": "Alo"}} if self.post_only else {"limit": {"tif": "Gtc"}}
-        
+    @staticmethod
+    def _order_request(quote: QuoteLevel, order_type: Dict) -> Dict:
+        """SDK-style order request for a grid level."""
+        return {
+            "coin": config.SPOT_SYMBOL,
+            "is_buy": quote.side is OrderSide.BID,
+            "sz": quote.size,
+            "limit_px": quote.price,
+            "order_type": order_type,
+            "reduce_only": False,
+        }
+    
+    async def _submit(self, request, quotes: List[QuoteLevel]) -> int:
+        """Await a bulk order/modify action and record its per-level statuses (in request order)."""
         try:
-            result = self.exchange.order(
-                name=config.SPOT_SYMBOL,
-                is_buy=is_buy,
-                sz=quote.size,
-                limit_px=quote.price,
-                order_type=order_type
-            )
-            return result
+            result = await request
         except Exception as e:
             logger.error(f"Order error: {e}")
-            return {"status": "error", "error": str(e)}
+            return 0
+        
+        if result.get("status") != "ok":
+            logger.warning(f"Order failed: {result}")
+            return 0
+        
+        statuses = result.get("response", {}).get("data", {}).get("statuses", [])
+        now = time.time()
+        return sum(
+            self._check_order_status(status, quote, now)
+            for quote, status in zip(quotes, statuses)
+        )
     
-    def _check_order_result(self, result: Dict, quote: QuoteLevel) -> bool:
-        """Check if order was placed successfully."""
-        if result.get("status") == "ok":
-            statuses = result.get("response", {}).get("data", {}).get("statuses", [])
-            for s in statuses:
-                if "resting" in s:
-                    order_id = s["resting"].get("oid")
-                    quote.order_id = str(order_id)
-                    quote.placed_at = time.time()
-                    self._active_orders[quote.order_id] = quote
-                    logger.debug(f"Order placed: {quote.side.value} L{quote.level} @ ${quote.price:.4f}")
-                    return True
-                elif "filled" in s:
-                    # POST_ONLY should not fill, but if it does...
-                    logger.info(f"Order filled immediately: {quote.side.value} @ ${quote.price:.4f}")
-                    return True
-                elif "error" in s:
-                    error = s.get("error", "Unknown error")
-                    # POST_ONLY rejection is expected when crossing
-                    if "would cross" in error.lower() or "post only" in error.lower():
-                        logger.debug(f"POST_ONLY rejected (would cross): {quote.side.value} @ ${quote.price:.4f}")
-                    else:
-                        logger.warning(f"Order error: {error}")
-                    return False
+    def _check_order_status(self, s: Dict, quote: QuoteLevel, now: float) -> bool:
+        """Check if a single order status from a bulk placement succeeded."""
+        if "resting" in s:
+            order_id = s["resting"].get("oid")
+            quote.order_id = str(order_id)
+            quote.placed_at = now
+            self._active_orders[quote.order_id] = quote
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Order placed: {quote.side.value} L{quote.level} @ ${quote.price:.4f}")
+            return True
+        elif "filled" in s:
+            # POST_ONLY should not fill, but if it does...
+            logger.info(f"Order filled immediately: {quote.side.value} @ ${quote.price:.4f}")
+            return True
+        elif "error" in s:
+            error = s.get("error", "Unknown error")
+            # POST_ONLY rejection is expected when crossing
+            if "would cross" in error.lower() or "post only" in error.lower():
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"POST_ONLY rejected (would cross): {quote.side.value} @ ${quote.price:.4f}")
+            else:
+                logger.warning(f"Order error: {error}")
+            return False
         
-        logger.warning(f"Order failed: {result}")
+        logger.warning(f"Order failed: {s}")
         return False
     
     async def cancel_all(self) -> bool:
@@ -237,13 +288,8 @@ class OrderManager:
             return True
         
         try:
-            loop = asyncio.get_event_loop()
-            
             # Get open orders
-            def get_orders():
-                return self.info.open_orders(config.ACCOUNT_ADDRESS)
-            
-            open_orders = await loop.run_in_executor(None, get_orders)
+            open_orders = await self.hl.open_orders(config.ACCOUNT_ADDRESS)
             
             # Filter spot orders
             spot_orders = [o for o in open_orders if o.get("coin") == config.SPOT_SYMBOL]
@@ -252,18 +298,15 @@ class OrderManager:
                 logger.debug("No orders to cancel")
                 return True
             
-            # Cancel each order
-            cancel_tasks = []
-            for order in spot_orders:
-                oid = order.get("oid")
-                if oid:
-                    def cancel_order(order_id):
-                        return self.exchange.cancel(config.SPOT_SYMBOL, order_id)
-                    cancel_tasks.append(loop.run_in_executor(None, cancel_order, oid))
+            # Cancel the whole grid in one signed action
+            oids = [int(o["oid"]) for o in spot_orders if o.get("oid")]
             
-            if cancel_tasks:
-                await asyncio.gather(*cancel_tasks, return_exceptions=True)
-                logger.debug(f"Cancelled {len(cancel_tasks)} orders")
+            if oids:
+                statuses = await self._bulk_cancel(oids)
+                failed = [s for s in statuses if s != "success"]
+                if failed:
+                    logger.debug(f"Cancel rejected for {len(failed)} orders: {failed}")
+                logger.debug(f"Cancelled {len(oids) - len(failed)} orders")
             
             self._active_orders.clear()
             self._last_cancel_all = time.time()
@@ -289,24 +332,42 @@ class OrderManager:
         if not stale_orders:
             return 0
         
+        try:
+            statuses = await self._bulk_cancel([int(oid) for oid in stale_orders])
+        except Exception as e:
+            logger.warning(f"Failed to cancel stale orders {stale_orders}: {e}")
+            return 0
+        
+        # An error status means the order already filled or was cancelled, so
+        # stop tracking it either way rather than retrying it on every call.
+        # pop() because cancel_all may have cleared the map during the await.
         cancelled = 0
-        for oid in stale_orders:
-            try:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    None, 
-                    lambda: self.exchange.cancel(config.SPOT_SYMBOL, int(oid))
-                )
-                del self._active_orders[oid]
+        for oid, status in zip(stale_orders, statuses):
+            self._active_orders.pop(oid, None)
+            if status == "success":
                 cancelled += 1
-            except Exception as e:
-                logger.warning(f"Failed to cancel stale order {oid}: {e}")
+            else:
+                logger.debug(f"Stale order {oid} not cancelled: {status}")
         
         if cancelled:
             logger.debug(f"Cancelled {cancelled} stale orders")
         
         return cancelled
     
+    async def _bulk_cancel(self, oids: List[int]) -> List[Any]:
+        """
+        Cancel spot orders in one request.
+        
+        Returns:
+            Per-order statuses ("success" or {"error": ...}), in oid order
+        """
+        result = await self.hl.bulk_cancel(
+            [{"coin": config.SPOT_SYMBOL, "oid": oid} for oid in oids]
+        )
+        if result.get("status") != "ok":
+            raise RuntimeError(f"Bulk cancel failed: {result}")
+        return result.get("response", {}).get("data", {}).get("statuses", [])
+    
     def get_active_order_count(self) -> int:
         """Get number of active orders."""
         return len(self._active_orders)
@@ -316,7 +377,8 @@ class OrderManager:
         if not self.grid.bids and not self.grid.asks:
             return "No grid active"
         
-        best_bid = max(self.grid.bids, key=lambda x: x.price).price if self.grid.bids else 0
-        best_ask = min(self.grid.asks, key=lambda x: x.price).price if self.grid.asks else 0
+        # Levels are built closest-first, so the best quote is always at index 0
+        best_bid = self.grid.bids[0].price if self.grid.bids else 0
+        best_ask = self.grid.asks[0].price if self.grid.asks else 0
         
         return f"Grid: {len(self.grid.bids)} bids (best ${best_bid:.4f}) | {len(self.grid.asks)} asks (best ${best_ask:.4f})"
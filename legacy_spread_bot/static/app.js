@@ -6,6 +6,7 @@
 class Dashboard {
     constructor() {
         this.ws = null;
+        this.decoder = new TextDecoder('utf-8');
         this.chart = null;
         this.state = null;
         this.chartData = {
@@ -60,6 +61,7 @@ class Dashboard {
 
         try {
             this.ws = new WebSocket(wsUrl);
+            this.ws.binaryType = 'arraybuffer';
 
             this.ws.onopen = () => {
                 this.addLog('success', 'WebSocket connected');
@@ -68,8 +70,19 @@ class Dashboard {
 
             this.ws.onmessage = (event) => {
                 try {
-                    const data = JSON.parse(event.data);
-                    this.handleUpdate(data);
+                    // Broadcasts arrive as UTF-8 JSON in binary frames
+                    const text = typeof event.data === 'string'
+                        ? event.data
+                        : this.decoder.decode(event.data);
+                    const msg = JSON.parse(text);
+
+                    // Server sends a full snapshot on connect and periodically,
+                    // and only the changed top-level sections in between
+                    if (msg.snapshot) {
+                        this.handleUpdate(msg.snapshot);
+                    } else if (msg.delta && this.state) {
+                        this.handleUpdate({ ...this.state, ...msg.delta });
+                    }
                 } catch (e) {
                     console.error('Failed to parse message:', e);
                 }
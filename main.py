@@ -16,6 +16,12 @@ import signal
 import sys
 import argparse
 import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
 
 # Load .env before importing config
 try:
@@ -29,6 +35,7 @@ from core.state import StateConfig, Position
 from core.execution_guard import ExecutionGuard
 from core.margin_monitor import MarginMonitor
 from utils.hyperliquid_client import HyperliquidClient
+from utils.async_hl import AsyncHLClient
 from utils.panic_switch import PanicSwitch
 from utils.notifier import get_notifier
 from services.funding_scanner import FundingScanner
@@ -52,16 +59,25 @@ if not hasattr(config, 'LOG_LEVEL'):
     config.LOG_LEVEL = "INFO"
 
 # Configure logging
+# Records are queued and written by a listener thread, so a slow disk or
+# stdout pipe never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(
+    _log_queue,
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('funding_bot.log')
+)
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL, logging.INFO),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('funding_bot.log')
-    ]
+    handlers=[QueueHandler(_log_queue)]
 )
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
+SPOT_META_CACHE = os.path.expanduser("~/.cache/funding_bot/spot_meta.json")
+SPOT_META_TTL = 3600  # Spot universe changes rarely; refetch at most hourly
+
 
 def print_banner():
     """Print startup banner."""
@@ -78,6 +94,37 @@ def print_banner():
     print(banner)
 
 
+async def load_spot_meta(hl: AsyncHLClient, use_cache: bool = True):
+    """
+    Fetch spotMeta, served from an on-disk cache while it is fresh.
+    
+    Returns:
+        The spotMeta dict, or None if the request failed
+    """
+    if use_cache:
+        try:
+            if time.time() - os.path.getmtime(SPOT_META_CACHE) < SPOT_META_TTL:
+                with open(SPOT_META_CACHE, 'rb') as f:
+                    return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            pass
+    
+    try:
+        spot_meta = await hl.spot_meta()
+    except Exception as e:
+        logger.error(f"Failed to fetch spot metadata: {e}")
+        return None
+    
+    try:
+        os.makedirs(os.path.dirname(SPOT_META_CACHE), exist_ok=True)
+        with open(SPOT_META_CACHE, 'wb') as f:
+            f.write(orjson.dumps(spot_meta))
+    except OSError as e:
+        logger.debug(f"Could not write spot meta cache: {e}")
+    
+    return spot_meta
+
+
 async def resolve_spot_asset_id(client: HyperliquidClient) -> str:
     """
     Dynamically resolve the spot asset ID for the configured coin.
@@ -92,50 +139,50 @@ async def resolve_spot_asset_id(client: HyperliquidClient) -> str:
     """
     logger.info(f"🔍 Resolving spot asset ID for {config.COIN_NAME}...")
     
-    loop = asyncio.get_event_loop()
-    
-    def _resolve():
+    def _resolve(spot_meta):
         try:
-            # Get spot metadata
-            spot_meta = client.info.spot_meta()
-            
             if not spot_meta or 'tokens' not in spot_meta:
                 logger.error("Failed to fetch spot metadata")
                 return None
             
             # Step 1: Find the token index for our coin
-            token_index = None
             usdc_index = 0  # USDC is always index 0
-            
-            for token in spot_meta.get('tokens', []):
-                if token.get('name') == config.COIN_NAME:
-                    token_index = token.get('index')
-                    logger.debug(f"Found {config.COIN_NAME} token at index {token_index}")
-                    break
+            name_to_index = {t.get('name'): t.get('index') for t in spot_meta.get('tokens', [])}
+            token_index = name_to_index.get(config.COIN_NAME)
             
             if token_index is None:
                 logger.error(f"Token {config.COIN_NAME} not found in spot metadata")
                 return None
+            logger.debug(f"Found {config.COIN_NAME} token at index {token_index}")
             
             # Step 2: Find the COIN/USDC pair in universe
-            # The pair has tokens = [coin_index, usdc_index]
-            for pair in spot_meta.get('universe', []):
-                tokens = pair.get('tokens', [])
-                # Check if this pair is COIN/USDC (order matters: [coin, usdc])
-                if len(tokens) == 2 and tokens[0] == token_index and tokens[1] == usdc_index:
-                    pair_index = pair.get('index')
-                    spot_symbol = f"@{pair_index}"
-                    logger.info(f"✅ Resolved {config.COIN_NAME}/USDC pair -> {spot_symbol}")
-                    return spot_symbol
+            # The pair has tokens = [coin_index, usdc_index] (order matters)
+            pair_by_tokens = {
+                tuple(pair.get('tokens', ())): pair.get('index')
+                for pair in spot_meta.get('universe', [])
+            }
+            pair_index = pair_by_tokens.get((token_index, usdc_index))
             
-            logger.error(f"No {config.COIN_NAME}/USDC pair found in spot universe")
-            return None
+            if pair_index is None:
+                logger.error(f"No {config.COIN_NAME}/USDC pair found in spot universe")
+                return None
+            
+            spot_symbol = f"@{pair_index}"
+            logger.info(f"✅ Resolved {config.COIN_NAME}/USDC pair -> {spot_symbol}")
+            return spot_symbol
             
         except Exception as e:
             logger.error(f"Asset resolution error: {e}")
             return None
     
-    spot_symbol = await loop.run_in_executor(None, _resolve)
+    hl = AsyncHLClient()
+    try:
+        spot_symbol = _resolve(await load_spot_meta(hl))
+        if not spot_symbol:
+            # The cached universe may predate a new listing; retry against the API
+            spot_symbol = _resolve(await load_spot_meta(hl, use_cache=False))
+    finally:
+        await hl.close()
     
     if not spot_symbol:
         logger.critical(f"❌ FATAL: Could not resolve spot asset ID for {config.COIN_NAME}")
@@ -216,8 +263,8 @@ async def verify_panic_switch(client: HyperliquidClient) -> bool:
     for coin, pos in state.positions.items():
         logger.warning(f"  - {coin}: Spot {pos.spot_size}, Perp {pos.perp_size}")
     
-    # Actually close if user confirms
-    confirm = input("\n⚠️  Type 'CLOSE ALL' to actually close these positions: ")
+    # Actually close if user confirms (prompt runs off-loop so WS/margin updates keep flowing)
+    confirm = await asyncio.to_thread(input, "\n⚠️  Type 'CLOSE ALL' to actually close these positions: ")
     
     if confirm == "CLOSE ALL":
         logger.critical("🚨 EXECUTING PANIC CLOSE...")
@@ -232,8 +279,33 @@ async def verify_panic_switch(client: HyperliquidClient) -> bool:
         return True
 
 
-async def run_bot(dry_run: bool = True, size_limit: float = None):
-    """Run the funding harvester bot."""
+async def verify_mode():
+    """Reconcile, then test the panic switch, on a single event loop."""
+    client = HyperliquidClient()
+    try:
+        await reconcile_from_exchange(client)
+        await verify_panic_switch(client)
+    finally:
+        await client.close()
+
+
+async def live_countdown(seconds: int):
+    """Print a one-line countdown; Ctrl+C aborts the start."""
+    for i in range(seconds, 0, -1):
+        print(f"\r    Starting live in {i}s...", end='', flush=True)
+        await asyncio.sleep(1)
+    print()
+
+
+async def run_bot(dry_run: bool = True, size_limit: float = None, countdown: int = 0):
+    """
+    Run the funding harvester bot.
+    
+    Args:
+        dry_run: Skip real order execution
+        size_limit: Per-coin position cap override (USD)
+        countdown: Seconds to wait before starting; client setup runs meanwhile
+    """
     
     # Override config if needed
     if dry_run:
@@ -245,7 +317,14 @@ async def run_bot(dry_run: bool = True, size_limit: float = None):
     
     # Initialize client
     logger.info("🔧 Initializing components...")
-    client = HyperliquidClient()
+    if countdown:
+        # Build the client in a worker thread while the safety countdown runs
+        client, _ = await asyncio.gather(
+            asyncio.to_thread(HyperliquidClient),
+            live_countdown(countdown)
+        )
+    else:
+        client = HyperliquidClient()
     
     # CRITICAL: Resolve spot asset ID dynamically
     await resolve_spot_asset_id(client)
@@ -261,6 +340,7 @@ async def run_bot(dry_run: bool = True, size_limit: float = None):
     guard = ExecutionGuard(client, dry_run=dry_run)
     scanner = FundingScanner(client)
     ws = WebSocketManager()
+    client.price_feed = ws  # get_prices reads the streamed books while they are fresh
     monitor = MarginMonitor(ws, guard, panic)
     harvester = FundingHarvester(guard, scanner, db, client)
     
@@ -273,6 +353,7 @@ async def run_bot(dry_run: bool = True, size_limit: float = None):
     
     # Start strategy (unless dry run)
     if not dry_run:
+        panic.start_presigner()
         await harvester.start()
     else:
         asyncio.create_task(dry_run_scanner(scanner))
@@ -284,7 +365,7 @@ async def run_bot(dry_run: bool = True, size_limit: float = None):
         logger.info("🛑 Shutdown signal received...")
         shutdown_event.set()
     
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     for sig in (signal.SIGINT, signal.SIGTERM):
         loop.add_signal_handler(sig, signal_handler)
     
@@ -313,9 +394,12 @@ async def run_bot(dry_run: bool = True, size_limit: float = None):
     finally:
         logger.info("Shutting down...")
         notifier.shutdown("Manual")
+        panic.stop()
         await harvester.stop()
         await ws.disconnect()
         await db.stop()
+        await client.close()
+        await notifier.aclose()
         logger.info("✅ Shutdown complete")
 
 
@@ -324,8 +408,8 @@ async def dry_run_scanner(scanner: FundingScanner):
     """Run scanner in dry run mode to show opportunities."""
     while True:
         try:
-            opportunities = await scanner.scan()
-            viable = [o for o in opportunities if o.viable]
+            await scanner.scan()
+            viable = scanner.viable
             
             if viable:
                 logger.info("📊 Dry Run - Current opportunities:")
@@ -388,28 +472,38 @@ def main():
         print("   Set HL_PRIVATE_KEY and HL_ACCOUNT_ADDRESS in .env file")
         sys.exit(1)
     
+    # libuv-backed event loop when available (not on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     try:
         # Panic switch verification mode
         if args.verify_panic:
-            client = HyperliquidClient()
-            asyncio.run(reconcile_from_exchange(client))
-            asyncio.run(verify_panic_switch(client))
+            asyncio.run(verify_mode())
             return
         
         # Normal operation
         if args.live:
             print("⚠️  WARNING: Live trading mode!")
             print("    Press Ctrl+C within 5 seconds to cancel...")
-            import time
-            time.sleep(5)
         
-        asyncio.run(run_bot(dry_run=not args.live, size_limit=args.size))
+        asyncio.run(run_bot(
+            dry_run=not args.live,
+            size_limit=args.size,
+            countdown=5 if args.live else 0
+        ))
         
     except KeyboardInterrupt:
         print("\n\n🛑 Bot stopped by user")
     except Exception as e:
         logger.exception(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        # Flush whatever is still queued
+        _log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import config
 import time
-import json
+import orjson
 import requests
 from hyperliquid.exchange import Exchange
 from hyperliquid.info import Info
@@ -13,31 +13,33 @@ def run():
     print("Resetting positions (V3)...")
     
     # 1. Setup
+    # One keep-alive session for every REST call, SDK included
+    session = requests.Session()
+    session.headers.update({'Content-Type': 'application/json'})
+    
     account = Account.from_key(config.PRIVATE_KEY)
     address = config.ACCOUNT_ADDRESS
     exchange = Exchange(account, constants.MAINNET_API_URL, account_address=address)
     info = Info(constants.MAINNET_API_URL, skip_ws=True)
+    for client in (info, exchange, getattr(exchange, 'info', None)):
+        if client is not None and hasattr(client, 'session'):
+            client.session = session
     mids = info.all_mids()
     
     # Need generic decimals helper
     meta = info.meta()
-    universe = meta['universe']
+    sz_decimals = {u['name']: u['szDecimals'] for u in meta['universe']}
     def get_sz_decimals(coin):
-        for u in universe:
-            if u['name'] == coin:
-                return u['szDecimals']
-        return 2
-
-    headers = {'Content-Type': 'application/json'}
+        return sz_decimals.get(coin, 2)
 
     # 2. Close Perps
     print("Checking perps...")
     # Use direct API for state to be safe
-    r = requests.post('https://api.hyperliquid.xyz/info', 
-                     json={'type': 'clearinghouseState', 'user': address}, 
-                     headers=headers)
-    state = r.json()
+    r = session.post('https://api.hyperliquid.xyz/info', 
+                     data=orjson.dumps({'type': 'clearinghouseState', 'user': address}))
+    state = orjson.loads(r.content)
     
+    closes = []  # (order request, event message)
     for p in state.get('assetPositions', []):
         pos = p['position']
         coin = pos['coin']
@@ -56,18 +58,27 @@ def run():
             abs_sz = round(abs(sz), decimals)
             
             print(f"Order: {coin} {'Buy' if is_buy else 'Sell'} {abs_sz} @ {limit_px}")
-            
-            res = exchange.order(coin, is_buy, abs_sz, limit_px, {"limit": {"tif": "Ioc"}}, reduce_only=True)
-            print(f"Result: {res}")
-            trade_events.add_event("exit", f"⚠️ RESET V3: Closed {sz} {coin} Perp", {"response": str(res)})
-            time.sleep(1)
+            closes.append((
+                {"coin": coin, "is_buy": is_buy, "sz": abs_sz, "limit_px": limit_px,
+                 "order_type": {"limit": {"tif": "Ioc"}}, "reduce_only": True},
+                f"⚠️ RESET V3: Closed {sz} {coin} Perp"
+            ))
+    
+    if closes:
+        # All perp closes go out as one signed action; statuses come back in order
+        res = exchange.bulk_orders([req for req, _ in closes])
+        print(f"Result: {res}")
+        statuses = res.get('response', {}).get('data', {}).get('statuses', []) if res.get('status') == 'ok' else []
+        for i, (_, message) in enumerate(closes):
+            status = statuses[i] if i < len(statuses) else res
+            trade_events.add_event("exit", message, {"response": str(status)})
+        time.sleep(0.1)  # Let the closes settle before selling spot
 
     # 3. Sell Spot
     print("Checking spot...")
-    r = requests.post('https://api.hyperliquid.xyz/info', 
-                     json={'type': 'spotClearinghouseState', 'user': address}, 
-                     headers=headers)
-    spot_state = r.json()
+    r = session.post('https://api.hyperliquid.xyz/info', 
+                     data=orjson.dumps({'type': 'spotClearinghouseState', 'user': address}))
+    spot_state = orjson.loads(r.content)
     
     ref_price = float(mids.get('HYPE', 0))
     if ref_price == 0: ref_price = 28.0
@@ -85,7 +96,6 @@ def run():
              res = exchange.order(symbol, False, sz_round, limit_px, {"limit": {"tif": "Ioc"}})
              print(f"Result: {res}")
              trade_events.add_event("exit", f"⚠️ RESET V3: Sold {sz_round} {coin} Spot", {"response": str(res)})
-             time.sleep(1)
 
     print("Reset V3 complete.")
 
@@ -1,30 +1,127 @@
 """
 DatabaseLogger - Async Queue-Based SQLite Logging
 
-Cold path logging via asyncio.Queue with dedicated consumer coroutine.
-Never blocks the hot path.
+Cold path logging via asyncio.Queue. A consumer coroutine drains events
+in batches and hands them to a dedicated writer thread that owns a plain
+sqlite3 connection. Never blocks the hot path.
 """
 
 import asyncio
 import aiosqlite
 import logging
+import queue
+import sqlite3
+import threading
 import time
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, Any, List, Optional, Union
+from dataclasses import dataclass, fields
 
 logger = logging.getLogger(__name__)
 
+# STRICT type checking where supported (SQLite 3.37+); table columns use only
+# STRICT-compatible types so the same DDL works either way
+_TABLE_OPTIONS = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
 
-@dataclass
-class LogEvent:
-    """Event to be logged to database."""
+LOG_QUEUE_MAX = 10000  # Bound on pending events; beyond this new events are dropped
+WRITER_BACKLOG_MAX = 64  # Batches waiting on the writer thread; when full the event queue backs up
+MAINTENANCE_INTERVAL = 900  # Writer runs PRAGMA optimize + WAL checkpoint every 15 minutes
+
+_SQL_INSERT_TRADE = (
+    "INSERT INTO trades (position_id, coin, side, market, size, price, cloid) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_FUNDING = (
+    "INSERT INTO funding_log (coin, position_id, amount_usdc, rate_applied, position_size) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_REBALANCE = (
+    "INSERT INTO rebalance_events "
+    "(position_id, event_type, margin_ratio_before, margin_ratio_after, amount_usd, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_POSITION = (
+    "INSERT INTO positions (coin, size, size_usd, entry_price_spot, entry_price_perp) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_CLOSE_POSITION = (
+    "UPDATE positions "
+    "SET status = 'CLOSED', close_reason = ?, closed_at = CURRENT_TIMESTAMP, "
+    "exit_price_spot = ?, exit_price_perp = ? "
+    "WHERE id = ?"
+)
+
+# Funding total, trade count and open positions in one round trip
+_SQL_STATS = (
+    "SELECT (SELECT COALESCE(SUM(amount_usdc), 0) FROM funding_log), "
+    "(SELECT COUNT(*) FROM trades), "
+    "(SELECT COUNT(*) FROM positions WHERE status = 'OPEN')"
+)
+
+# Event records: one slotted type per table write. Field order matches the
+# statement's parameter order so attrgetter can build the row directly.
+
+@dataclass(slots=True)
+class TradeEvent:
+    position_id: int
+    coin: str
+    side: str
+    market: str
+    size: float
+    price: float
+    cloid: Optional[str] = None
+
+
+@dataclass(slots=True)
+class FundingEvent:
+    coin: str
+    position_id: int
+    amount: float
+    rate: float
+    size: float
+
+
+@dataclass(slots=True)
+class RebalanceEvent:
+    position_id: int
     event_type: str
-    data: Dict[str, Any]
-    timestamp: float = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = time.time()
+    margin_before: float
+    margin_after: float
+    amount_usd: float = 0
+    notes: str = ""
+
+
+@dataclass(slots=True)
+class PositionOpenEvent:
+    coin: str
+    size: float
+    size_usd: float
+    entry_spot: float
+    entry_perp: float
+
+
+@dataclass(slots=True)
+class PositionCloseEvent:
+    reason: str
+    exit_spot: float
+    exit_perp: float
+    position_id: int
+
+
+LogEvent = Union[TradeEvent, FundingEvent, RebalanceEvent, PositionOpenEvent, PositionCloseEvent]
+
+# Event type -> (statement, event -> parameter tuple)
+_EVENT_SQL = {
+    cls: (sql, attrgetter(*(f.name for f in fields(cls))))
+    for cls, sql in (
+        (TradeEvent, _SQL_INSERT_TRADE),
+        (FundingEvent, _SQL_INSERT_FUNDING),
+        (RebalanceEvent, _SQL_INSERT_REBALANCE),
+        (PositionOpenEvent, _SQL_INSERT_POSITION),
+        (PositionCloseEvent, _SQL_CLOSE_POSITION),
+    )
+}
 
 
 class DatabaseLogger:
@@ -37,92 +134,77 @@ class DatabaseLogger:
     - All SQLite I/O happens in consumer, never in hot path
     """
     
+    __slots__ = (
+        "db_file", "_queue", "_running", "_dropped", "_batches", "_writer",
+        "_consumer_done", "_read_conn", "_read_lock", "_closed",
+    )
+    
     def __init__(self, db_file: str = "funding_bot.db"):
         self.db_file = db_file
-        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_QUEUE_MAX)
         self._running = False
+        self._dropped = 0  # Events lost to a full queue or a dead writer
+        
+        # Consumer -> writer thread hand-off; None tells the writer to finish
+        self._batches: queue.Queue = queue.Queue(maxsize=WRITER_BACKLOG_MAX)
+        self._writer: Optional[threading.Thread] = None
+        self._consumer_done = asyncio.Event()
+        self._read_conn: Optional[aiosqlite.Connection] = None
+        self._read_lock = asyncio.Lock()  # One reader connection even under concurrent get_stats
+        self._closed = False
     
-    def log(self, event_type: str, data: Dict[str, Any]):
+    def log(self, event: LogEvent):
         """
         Non-blocking log. Called from hot path.
         
         Just puts event on queue - never blocks.
         """
         try:
-            self._queue.put_nowait(LogEvent(event_type, data))
+            self._queue.put_nowait(event)
         except asyncio.QueueFull:
-            logger.warning("Log queue full, dropping event")
+            self._dropped += 1
+            if self._dropped == 1 or self._dropped % 1000 == 0:
+                logger.warning("Log queue full, dropping event (%d dropped so far)", self._dropped)
     
     def log_trade(self, position_id: int, coin: str, side: str, 
                   market: str, size: float, price: float, cloid: str = None):
         """Log a trade execution."""
-        self.log("trade", {
-            "position_id": position_id,
-            "coin": coin,
-            "side": side,
-            "market": market,
-            "size": size,
-            "price": price,
-            "cloid": cloid
-        })
+        self.log(TradeEvent(position_id, coin, side, market, size, price, cloid))
     
     def log_funding(self, coin: str, position_id: int, 
                     amount: float, rate: float, size: float):
         """Log a funding payment received."""
-        self.log("funding", {
-            "coin": coin,
-            "position_id": position_id,
-            "amount": amount,
-            "rate": rate,
-            "size": size
-        })
+        self.log(FundingEvent(coin, position_id, amount, rate, size))
     
     def log_rebalance(self, position_id: int, event_type: str,
                        margin_before: float, margin_after: float,
                        amount_usd: float = 0, notes: str = ""):
         """Log a rebalance event."""
-        self.log("rebalance", {
-            "position_id": position_id,
-            "event_type": event_type,
-            "margin_before": margin_before,
-            "margin_after": margin_after,
-            "amount_usd": amount_usd,
-            "notes": notes
-        })
+        self.log(RebalanceEvent(position_id, event_type, margin_before, margin_after, amount_usd, notes))
     
     def log_position_open(self, coin: str, size: float, size_usd: float,
                            entry_spot: float, entry_perp: float) -> None:
         """Log position opening."""
-        self.log("position_open", {
-            "coin": coin,
-            "size": size,
-            "size_usd": size_usd,
-            "entry_spot": entry_spot,
-            "entry_perp": entry_perp
-        })
+        self.log(PositionOpenEvent(coin, size, size_usd, entry_spot, entry_perp))
     
     def log_position_close(self, position_id: int, reason: str,
                             exit_spot: float = 0, exit_perp: float = 0):
         """Log position closing."""
-        self.log("position_close", {
-            "position_id": position_id,
-            "reason": reason,
-            "exit_spot": exit_spot,
-            "exit_perp": exit_perp
-        })
+        self.log(PositionCloseEvent(reason, exit_spot, exit_perp, position_id))
     
     async def start_consumer(self):
         """
         Run as background task. Processes log events.
         
-        All database I/O happens here, off the hot path.
+        Batches pending events and passes them to the writer thread; all
+        SQLite I/O happens there, off the event loop.
         """
         self._running = True
+        self._writer = threading.Thread(target=self._writer_thread, name="db-writer", daemon=True)
+        self._writer.start()
         logger.info("💾 Database consumer started")
         
-        async with aiosqlite.connect(self.db_file) as db:
-            await self._init_tables(db)
-            
+        try:
             while self._running:
                 try:
                     # Wait for event with timeout for graceful shutdown
@@ -130,33 +212,124 @@ class DatabaseLogger:
                         self._queue.get(),
                         timeout=1.0
                     )
-                    await self._process_event(db, event)
-                    self._queue.task_done()
+                    
+                    # Drain whatever else is pending into the same transaction
+                    batch = [event] + self._drain()
+                    if not await self._hand_off(batch):
+                        self._drop_batch(batch)
+                    for _ in batch:
+                        self._queue.task_done()
                     
                 except asyncio.TimeoutError:
                     continue
                 except Exception as e:
                     logger.error(f"Database consumer error: {e}")
+        finally:
+            # Hand over anything still queued, then let the writer commit and close
+            batch = self._drain()
+            if batch and not await self._hand_off(batch):
+                self._drop_batch(batch)
+            if await self._hand_off(None):
+                await asyncio.to_thread(self._writer.join)
+            self._consumer_done.set()
+    
+    async def _hand_off(self, batch: Optional[List[LogEvent]]) -> bool:
+        """
+        Pass a batch (or the None sentinel) to the writer thread.
+        
+        Waits for room in the bounded backlog; while waiting nothing is
+        drained, so the event queue fills and log() starts dropping.
+        
+        Returns:
+            False if the writer thread is not running
+        """
+        while self._writer.is_alive():
+            try:
+                self._batches.put_nowait(batch)
+                return True
+            except queue.Full:
+                await asyncio.sleep(0.05)
+        return False
+    
+    def _drop_batch(self, batch: List[LogEvent]):
+        """Count a batch that could not reach the writer as dropped."""
+        self._dropped += len(batch)
+        logger.warning("Database writer not running, dropped %d events (%d dropped so far)",
+                       len(batch), self._dropped)
+    
+    def _drain(self) -> List[LogEvent]:
+        """Take every event currently queued without waiting."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return batch
+    
+    def _writer_thread(self):
+        """Own the sqlite3 connection; write batches until the None sentinel."""
+        try:
+            conn = sqlite3.connect(
+                self.db_file, isolation_level=None, cached_statements=len(_EVENT_SQL) + 8
+            )
+            self._init_tables(conn)
+            # One cursor for the writer's lifetime; statements come from the
+            # connection's prepared-statement cache keyed on the constant SQL text
+            cur = conn.cursor()
+        except Exception as e:
+            logger.error(f"Database writer failed to start: {e}")
+            return
+        
+        in_memory = self.db_file == ":memory:"
+        next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+        try:
+            while True:
+                try:
+                    timeout = None if in_memory else max(0.0, next_maintenance - time.monotonic())
+                    batch = self._batches.get(timeout=timeout)
+                except queue.Empty:
+                    # Periodically refresh planner stats and checkpoint the WAL
+                    try:
+                        conn.execute("PRAGMA optimize")
+                        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                    except Exception as e:
+                        logger.warning(f"Database maintenance failed: {e}")
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+                    continue
+                
+                if batch is None:
+                    break
+                self._write_batch(cur, batch)
+        finally:
+            conn.close()
     
     async def stop(self):
-        """Stop the consumer gracefully."""
+        """Stop the consumer gracefully, flushing remaining events."""
         self._running = False
-        # Process remaining events
-        while not self._queue.empty():
-            try:
-                event = self._queue.get_nowait()
-                async with aiosqlite.connect(self.db_file) as db:
-                    await self._process_event(db, event)
-            except:
-                break
+        self._closed = True
+        if self._writer is not None:
+            await self._consumer_done.wait()
+        async with self._read_lock:
+            if self._read_conn is not None:
+                await self._read_conn.close()
+                self._read_conn = None
         logger.info("💾 Database consumer stopped")
     
-    async def _init_tables(self, db):
+    def _init_tables(self, conn: sqlite3.Connection):
         """Initialize database tables."""
+        # WAL + relaxed fsync for the bursty append-only log; readers (get_stats) don't block
+        if self.db_file != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA busy_timeout=30000")
+        
         # Positions
-        await db.execute("""
+        conn.execute(f"""
             CREATE TABLE IF NOT EXISTS positions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 coin TEXT NOT NULL,
                 size REAL NOT NULL,
                 size_usd REAL NOT NULL,
@@ -165,29 +338,36 @@ class DatabaseLogger:
                 exit_price_spot REAL,
                 exit_price_perp REAL,
                 status TEXT DEFAULT 'OPEN',
-                opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                closed_at TIMESTAMP,
+                opened_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                closed_at TEXT,
                 close_reason TEXT
-            )
+            ){_TABLE_OPTIONS}
         """)
+        # Partial index: only open rows, so the open-position count stays O(open)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_positions_open ON positions(status) WHERE status = 'OPEN'"
+        )
         
         # Funding payments
-        await db.execute("""
+        conn.execute(f"""
             CREATE TABLE IF NOT EXISTS funding_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 coin TEXT NOT NULL,
                 position_id INTEGER,
                 amount_usdc REAL NOT NULL,
                 rate_applied REAL NOT NULL,
                 position_size REAL NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+            ){_TABLE_OPTIONS}
         """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_funding_coin_ts ON funding_log(coin, timestamp)"
+        )
         
         # Trades
-        await db.execute("""
+        conn.execute(f"""
             CREATE TABLE IF NOT EXISTS trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 position_id INTEGER,
                 coin TEXT NOT NULL,
                 side TEXT NOT NULL,
@@ -195,117 +375,78 @@ class DatabaseLogger:
                 size REAL NOT NULL,
                 price REAL NOT NULL,
                 cloid TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+            ){_TABLE_OPTIONS}
         """)
         
         # Rebalance events
-        await db.execute("""
+        conn.execute(f"""
             CREATE TABLE IF NOT EXISTS rebalance_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 position_id INTEGER,
                 event_type TEXT NOT NULL,
                 margin_ratio_before REAL,
                 margin_ratio_after REAL,
                 amount_usd REAL,
                 notes TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+            ){_TABLE_OPTIONS}
         """)
         
-        await db.commit()
         logger.info("💾 Database tables initialized")
     
-    async def _process_event(self, db, event: LogEvent):
-        """Process a single log event."""
+    def _write_batch(self, cur: sqlite3.Cursor, batch: List[LogEvent]):
+        """
+        Write a batch of events in one transaction.
+        
+        Consecutive events of the same type go through one executemany;
+        grouping runs (rather than bucketing by type) keeps position_open
+        ahead of a position_close for the same row.
+        """
         try:
-            if event.event_type == "trade":
-                await db.execute("""
-                    INSERT INTO trades (position_id, coin, side, market, size, price, cloid)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    event.data.get("position_id"),
-                    event.data.get("coin"),
-                    event.data.get("side"),
-                    event.data.get("market"),
-                    event.data.get("size"),
-                    event.data.get("price"),
-                    event.data.get("cloid")
-                ))
-                
-            elif event.event_type == "funding":
-                await db.execute("""
-                    INSERT INTO funding_log (coin, position_id, amount_usdc, rate_applied, position_size)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    event.data.get("coin"),
-                    event.data.get("position_id"),
-                    event.data.get("amount"),
-                    event.data.get("rate"),
-                    event.data.get("size")
-                ))
-                
-            elif event.event_type == "rebalance":
-                await db.execute("""
-                    INSERT INTO rebalance_events 
-                    (position_id, event_type, margin_ratio_before, margin_ratio_after, amount_usd, notes)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    event.data.get("position_id"),
-                    event.data.get("event_type"),
-                    event.data.get("margin_before"),
-                    event.data.get("margin_after"),
-                    event.data.get("amount_usd"),
-                    event.data.get("notes")
-                ))
-                
-            elif event.event_type == "position_open":
-                await db.execute("""
-                    INSERT INTO positions (coin, size, size_usd, entry_price_spot, entry_price_perp)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    event.data.get("coin"),
-                    event.data.get("size"),
-                    event.data.get("size_usd"),
-                    event.data.get("entry_spot"),
-                    event.data.get("entry_perp")
-                ))
-                
-            elif event.event_type == "position_close":
-                await db.execute("""
-                    UPDATE positions 
-                    SET status = 'CLOSED', close_reason = ?, closed_at = CURRENT_TIMESTAMP,
-                        exit_price_spot = ?, exit_price_perp = ?
-                    WHERE id = ?
-                """, (
-                    event.data.get("reason"),
-                    event.data.get("exit_spot"),
-                    event.data.get("exit_perp"),
-                    event.data.get("position_id")
-                ))
-            
-            await db.commit()
+            cur.execute("BEGIN")
+            for event_cls, run in groupby(batch, key=type):
+                sql, to_params = _EVENT_SQL[event_cls]
+                cur.executemany(sql, map(to_params, run))
+            cur.execute("COMMIT")
             
         except Exception as e:
-            logger.error(f"Failed to process event {event.event_type}: {e}")
+            if cur.connection.in_transaction:
+                cur.execute("ROLLBACK")
+            if len(batch) == 1:
+                logger.error(f"Failed to process {type(batch[0]).__name__}: {e}")
+                return
+            # Retry one at a time so a single bad event doesn't drop the batch
+            for event in batch:
+                self._write_batch(cur, [event])
+    
+    async def _get_read_conn(self) -> aiosqlite.Connection:
+        """Persistent read-only connection for stats queries, opened on first use."""
+        if self._read_conn is not None:
+            return self._read_conn
+        
+        async with self._read_lock:
+            if self._closed:
+                raise RuntimeError("DatabaseLogger is stopped")
+            if self._read_conn is None:
+                if self.db_file == ":memory:":
+                    conn = await aiosqlite.connect(self.db_file)
+                else:
+                    conn = await aiosqlite.connect(f"file:{self.db_file}?mode=ro", uri=True)
+                    await conn.execute("PRAGMA query_only=1")
+                self._read_conn = conn
+        return self._read_conn
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get database statistics (for dashboard)."""
-        async with aiosqlite.connect(self.db_file) as db:
-            # Total funding earned
-            cursor = await db.execute("SELECT SUM(amount_usdc) FROM funding_log")
-            total_funding = (await cursor.fetchone())[0] or 0
-            
-            # Trade count
-            cursor = await db.execute("SELECT COUNT(*) FROM trades")
-            trade_count = (await cursor.fetchone())[0]
-            
-            # Open positions
-            cursor = await db.execute("SELECT COUNT(*) FROM positions WHERE status = 'OPEN'")
-            open_positions = (await cursor.fetchone())[0]
-            
-            return {
-                "total_funding_usd": round(total_funding, 4),
-                "total_trades": trade_count,
-                "open_positions": open_positions
-            }
+        db = await self._get_read_conn()
+        cursor = await db.execute(_SQL_STATS)
+        total_funding, trade_count, open_positions = await cursor.fetchone()
+        await cursor.close()
+        
+        return {
+            "total_funding_usd": round(total_funding, 4),
+            "total_trades": trade_count,
+            "open_positions": open_positions,
+            "dropped_events": self._dropped
+        }
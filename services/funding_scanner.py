@@ -5,17 +5,22 @@ Scans Hyperliquid for coins with high funding rates and sufficient liquidity.
 Includes break-even validation to avoid fee traps.
 """
 
+import asyncio
 import logging
 import time
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
 
 import config
 
 logger = logging.getLogger(__name__)
 
+HOURS_PER_YEAR = 24 * 365
+LIQUIDITY_CONCURRENCY = 16  # Max in-flight liquidity lookups per scan
+CAPITAL_EFFICIENCY = 0.40  # Effective position is only 40% of capital (40/40/20 split)
 
-@dataclass
+
+@dataclass(slots=True)
 class FundingOpportunity:
     """A validated funding opportunity."""
     coin: str
@@ -35,6 +40,14 @@ class FundingScanner:
     Combines scanner + validator into one robust module.
     """
     
+    __slots__ = (
+        "client", "min_apr", "min_liquidity_usd", "max_breakeven_days",
+        "fee_spot_taker", "fee_perp_taker", "slippage_estimate",
+        "roundtrip_cost", "_roundtrip_cost_pct",
+        "_hourly_to_daily_eff", "_hourly_to_annual_eff", "_liquidity_sem",
+        "_last_scan", "_last_scan_mono", "_scan_cache", "_viable_cache", "_cache_ttl",
+    )
+    
     def __init__(self, client, 
                  min_apr: float = None,
                  min_liquidity_usd: float = 1_000_000,
@@ -60,13 +73,27 @@ class FundingScanner:
         # Calculate roundtrip cost
         one_way = self.fee_spot_taker + self.fee_perp_taker + (self.slippage_estimate * 2)
         self.roundtrip_cost = one_way * 2
+        self._roundtrip_cost_pct = self.roundtrip_cost * 100
+        
+        # Hourly rate -> effective daily / annual income factors
+        self._hourly_to_daily_eff = 24 * CAPITAL_EFFICIENCY
+        self._hourly_to_annual_eff = self._hourly_to_daily_eff * 365
         
-        # Cache
-        self._last_scan = 0
-        self._scan_cache: List[FundingOpportunity] = []
+        self._liquidity_sem = asyncio.Semaphore(LIQUIDITY_CONCURRENCY)
+        
+        # Cache (tuples so callers can't mutate them)
+        self._last_scan = 0  # Wall clock, for display
+        self._last_scan_mono = float('-inf')  # Monotonic, for the TTL
+        self._scan_cache: Tuple[FundingOpportunity, ...] = ()
+        self._viable_cache: Tuple[FundingOpportunity, ...] = ()
         self._cache_ttl = 60  # seconds
     
-    async def scan(self, force: bool = False) -> List[FundingOpportunity]:
+    @property
+    def viable(self) -> Tuple[FundingOpportunity, ...]:
+        """Viable opportunities from the last scan, best first."""
+        return self._viable_cache
+    
+    async def scan(self, force: bool = False) -> Tuple[FundingOpportunity, ...]:
         """
         Scan for funding opportunities.
         
@@ -77,7 +104,7 @@ class FundingScanner:
             List of viable opportunities, sorted by APY
         """
         # Check cache
-        if not force and (time.time() - self._last_scan) < self._cache_ttl:
+        if not force and (time.monotonic() - self._last_scan_mono) < self._cache_ttl:
             return self._scan_cache
         
         logger.info("🔍 Scanning for funding opportunities...")
@@ -89,18 +116,20 @@ class FundingScanner:
             coin = getattr(config, 'COIN_NAME', 'HYPE')
             funding_rates = await self._get_all_funding_rates()
             
-            logger.info(f"📊 Funding rates fetched: {funding_rates}")
+            logger.info("📊 Funding rates fetched: %s", funding_rates)
             
+            # Phase 1: cheap arithmetic filter, no I/O
+            candidates = []  # (coin, rate, apr, validation)
             for coin_name, rate in funding_rates.items():
                 # Calculate APR (rate is hourly, convert to annual percentage)
-                apr = rate * 24 * 365  # This is a ratio, not percentage
+                apr = rate * HOURS_PER_YEAR  # This is a ratio, not percentage
                 apr_pct = apr * 100  # Convert to percentage for display
                 
-                logger.info(f"🔍 Scanning {coin_name}: Rate={rate:.8f}, APR={apr_pct:.2f}%")
+                logger.info("🔍 Scanning %s: Rate=%.8f, APR=%.2f%%", coin_name, rate, apr_pct)
                 
                 # Skip if funding is negative (shorts pay)
                 if rate <= 0:
-                    logger.warning(f"⚠️ {coin_name}: Skipping - funding rate is {rate} (negative/zero)")
+                    logger.warning("⚠️ %s: Skipping - funding rate is %s (negative/zero)", coin_name, rate)
                     opportunities.append(FundingOpportunity(
                         coin=coin_name,
                         funding_rate_hourly=rate,
@@ -115,26 +144,43 @@ class FundingScanner:
                 
                 # Check minimum APR (min_apr is a ratio like 0.20 for 20%)
                 if apr < self.min_apr:
-                    logger.info(f"⚠️ {coin_name}: Below target - APR {apr_pct:.2f}% < {self.min_apr*100:.0f}%")
+                    logger.info("⚠️ %s: Below target - APR %.2f%% < %.0f%%", coin_name, apr_pct, self.min_apr * 100)
                     opportunities.append(FundingOpportunity(
                         coin=coin_name,
                         funding_rate_hourly=rate,
                         funding_apr=apr,
                         liquidity_usd=10_000_000,
                         days_to_breakeven=999,
-                        net_apy=apr_pct - (self.roundtrip_cost * 100),
+                        net_apy=apr_pct - self._roundtrip_cost_pct,
                         viable=False,
                         reason=f"APR {apr_pct:.1f}% below {self.min_apr*100:.0f}% target"
                     ))
                     continue
                 
-                # Check liquidity
-                liquidity = await self._get_liquidity(coin_name)
-                
                 # Validate break-even
                 validation = self._validate_opportunity(rate, apr)
+                if not validation["viable"]:
+                    opportunities.append(FundingOpportunity(
+                        coin=coin_name,
+                        funding_rate_hourly=rate,
+                        funding_apr=apr,
+                        liquidity_usd=0,
+                        days_to_breakeven=validation["days_to_breakeven"],
+                        net_apy=validation["net_apy"],
+                        viable=False,
+                        reason=validation.get("reason", "")
+                    ))
+                    continue
                 
-                logger.info(f"✅ {coin_name}: Viable! APR={apr_pct:.2f}%, BE={validation['days_to_breakeven']}d")
+                candidates.append((coin_name, rate, apr, validation))
+            
+            # Phase 2: only coins that passed the arithmetic filter pay for a liquidity
+            # lookup, and those run concurrently
+            liquidities = await asyncio.gather(
+                *(self._get_liquidity_limited(c[0]) for c in candidates)
+            )
+            for (coin_name, rate, apr, validation), liquidity in zip(candidates, liquidities):
+                logger.info("✅ %s: Viable! APR=%.2f%%, BE=%.1fd", coin_name, apr * 100, validation["days_to_breakeven"])
                 
                 opportunities.append(FundingOpportunity(
                     coin=coin_name,
@@ -143,7 +189,7 @@ class FundingScanner:
                     liquidity_usd=liquidity,
                     days_to_breakeven=validation["days_to_breakeven"],
                     net_apy=validation["net_apy"],
-                    viable=validation["viable"],
+                    viable=True,
                     reason=validation.get("reason", "")
                 ))
             
@@ -151,28 +197,32 @@ class FundingScanner:
             opportunities.sort(key=lambda x: (x.viable, x.net_apy), reverse=True)
             
             # Update cache
-            self._scan_cache = opportunities
+            self._scan_cache = tuple(opportunities)
+            self._viable_cache = tuple(o for o in opportunities if o.viable)
             self._last_scan = time.time()
+            self._last_scan_mono = time.monotonic()
             
             # Log summary
-            viable = [o for o in opportunities if o.viable]
-            logger.info(f"📊 Found {len(viable)} viable opportunities out of {len(opportunities)} scanned")
+            logger.info("📊 Found %d viable opportunities out of %d scanned", len(self._viable_cache), len(opportunities))
             
-            for o in opportunities:  # Show all, not just viable
-                status = "✅" if o.viable else "❌"
-                logger.info(f"  {status} {o.coin}: APR {o.funding_apr*100:.1f}%, Net APY {o.net_apy:.1f}%, {o.reason}")
+            if logger.isEnabledFor(logging.INFO):
+                for o in opportunities:  # Show all, not just viable
+                    status = "✅" if o.viable else "❌"
+                    logger.info("  %s %s: APR %.1f%%, Net APY %.1f%%, %s", status, o.coin, o.funding_apr * 100, o.net_apy, o.reason)
             
-            return opportunities
+            return self._scan_cache
             
         except Exception as e:
             logger.error(f"Scan error: {e}", exc_info=True)
-            return []
+            # Don't let callers reading .viable trade off an older scan
+            self._scan_cache = ()
+            self._viable_cache = ()
+            return ()
     
     async def get_best_opportunity(self) -> Optional[FundingOpportunity]:
         """Get the single best opportunity right now."""
-        opportunities = await self.scan()
-        viable = [o for o in opportunities if o.viable]
-        return viable[0] if viable else None
+        await self.scan()
+        return self._viable_cache[0] if self._viable_cache else None
     
     def _validate_opportunity(self, hourly_rate: float, apr: float) -> Dict:
         """
@@ -180,11 +230,8 @@ class FundingScanner:
         
         Uses 40% capital efficiency (due to 40/40/20 split).
         """
-        # Effective position is only 40% of capital (rest is margin + buffer)
-        capital_efficiency = 0.40
-        
         # Daily income from funding (on effective position)
-        daily_income_pct = hourly_rate * 24 * capital_efficiency
+        daily_income_pct = hourly_rate * self._hourly_to_daily_eff
         
         # Break-even days = total fees / daily income
         if daily_income_pct <= 0:
@@ -192,9 +239,8 @@ class FundingScanner:
         
         days_to_breakeven = self.roundtrip_cost / daily_income_pct
         
-        # Net APY after accounting for fees
-        annual_income = daily_income_pct * 365
-        net_apy = (annual_income - self.roundtrip_cost) * 100  # As percentage
+        # Net APY after accounting for fees, as percentage
+        net_apy = hourly_rate * self._hourly_to_annual_eff * 100 - self._roundtrip_cost_pct
         
         # Viability check - relaxed for testing
         viable = (days_to_breakeven < self.max_breakeven_days) and (net_apy > 5.0)
@@ -208,8 +254,8 @@ class FundingScanner:
         
         return {
             "viable": viable,
-            "days_to_breakeven": round(days_to_breakeven, 1),
-            "net_apy": round(net_apy, 1),
+            "days_to_breakeven": days_to_breakeven,
+            "net_apy": net_apy,
             "reason": reason
         }
     
@@ -233,7 +279,7 @@ class FundingScanner:
                 if asset.get('name') == coin:
                     ctx = asset_ctxs[i] if i < len(asset_ctxs) else {}
                     rate = float(ctx.get('funding', 0))
-                    logger.info(f"📡 Fetched {coin} funding rate: {rate:.8f} ({rate*100:.4f}% hourly)")
+                    logger.info("📡 Fetched %s funding rate: %.8f (%.4f%% hourly)", coin, rate, rate * 100)
                     return {coin: rate}
             
             logger.warning(f"⚠️ Coin {coin} not found in universe")
@@ -243,6 +289,11 @@ class FundingScanner:
             logger.error(f"Funding rate fetch error: {e}", exc_info=True)
             return {}
     
+    async def _get_liquidity_limited(self, coin: str) -> float:
+        """_get_liquidity under the scan-wide concurrency cap."""
+        async with self._liquidity_sem:
+            return await self._get_liquidity(coin)
+    
     async def _get_liquidity(self, coin: str) -> float:
         """Get 24h volume for a coin."""
         # Simplified - in production would fetch actual volume
@@ -251,7 +302,7 @@ class FundingScanner:
     
     def get_scan_summary(self) -> Dict:
         """Get summary of last scan for dashboard."""
-        viable = [o for o in self._scan_cache if o.viable]
+        viable = self._viable_cache
         return {
             "last_scan": self._last_scan,
             "total_scanned": len(self._scan_cache),
@@ -32,6 +32,12 @@ class FundingHarvester:
     - Exit when funding goes negative
     """
     
+    __slots__ = (
+        "guard", "scanner", "db", "client",
+        "max_position_usd", "max_total_exposure", "scan_interval", "funding_check_interval",
+        "_running", "_last_scan", "_last_funding_log",
+    )
+    
     def __init__(self, execution_guard: ExecutionGuard, 
                  scanner: FundingScanner,
                  database: DatabaseLogger,
@@ -65,97 +71,112 @@ class FundingHarvester:
         logger.info("🌾 Funding Harvester started")
         
         # Run main loop
-        asyncio.create_task(self._strategy_loop())
-        asyncio.create_task(self._funding_log_loop())
+        asyncio.create_task(self._main_loop())
     
     async def stop(self):
         """Stop the strategy."""
         self._running = False
         logger.info("🌾 Funding Harvester stopped")
     
-    async def _strategy_loop(self):
-        """Main strategy loop - scans and enters positions."""
+    async def _main_loop(self):
+        """
+        Single scheduler for both cadences, on monotonic deadlines.
+        
+        Scans and enters positions right away and then every scan_interval;
+        logs funding payments every funding_check_interval.
+        """
+        next_scan = time.monotonic()
+        next_funding_log = next_scan + self.funding_check_interval
+        
         while self._running:
-            try:
-                await self._check_and_execute()
-            except Exception as e:
-                logger.error(f"Strategy loop error: {e}")
+            now = time.monotonic()
+            
+            if now >= next_scan:
+                try:
+                    await self._check_and_execute()
+                except Exception as e:
+                    logger.error(f"Strategy loop error: {e}")
+                next_scan = time.monotonic() + self.scan_interval
+            
+            if now >= next_funding_log:
+                try:
+                    await self._log_funding_payments()
+                except Exception as e:
+                    logger.error(f"Funding log error: {e}")
+                next_funding_log = time.monotonic() + self.funding_check_interval
             
-            await asyncio.sleep(self.scan_interval)
+            await asyncio.sleep(max(0.0, min(next_scan, next_funding_log) - time.monotonic()))
     
     async def _check_and_execute(self):
         """Check for opportunities and execute if conditions met."""
         state = StateConfig.get()
         
-        # Check if we have capacity
-        if state.total_exposure_usd >= self.max_total_exposure:
+        # Check if we have capacity (minimum position lowered for testing)
+        remaining_capacity = self.max_total_exposure - state.total_exposure_usd
+        if remaining_capacity < 5:
             logger.debug("Max exposure reached, skipping scan")
             return
         
         # Scan for opportunities
-        opportunities = await self.scanner.scan()
-        viable = [o for o in opportunities if o.viable]
+        await self.scanner.scan()
+        self._last_scan = time.time()
         
-        if not viable:
+        # Skip coins we already hold before spending any round trips
+        candidates = [o for o in self.scanner.viable if not state.has_position(o.coin)]
+        
+        if not candidates:
             logger.debug("No viable opportunities found")
             return
         
-        # Check each viable opportunity
-        for opp in viable:
-            # Skip if we already have a position in this coin
-            if state.has_position(opp.coin):
-                continue
-            
-            # Get balances FIRST to determine available capital
-            balances = await self.client.get_balances()
-            spot_available = balances["spot_usdc"]
-            perp_available = balances["perp_margin"]
-            
-            # Calculate max position based on available capital
-            # Need spot USDC for buying + perp margin for shorting
-            max_from_spot = spot_available * 0.95  # Use 95% of spot
-            max_from_perp = perp_available * 4  # 25% margin = 4x leverage max
-            
-            # Position size is limited by both
-            available_size = min(max_from_spot, max_from_perp, self.max_position_usd)
-            
-            # Calculate remaining capacity
-            remaining_capacity = self.max_total_exposure - state.total_exposure_usd
-            size_usd = min(available_size, remaining_capacity)
-            
-            logger.info(f"💰 Balance check: Spot=${spot_available:.2f}, Perp=${perp_available:.2f}, Max size=${size_usd:.2f}")
-            
-            if size_usd < 5:  # Minimum position lowered for testing
-                logger.warning(f"Position size ${size_usd:.2f} too small (min $5)")
-                continue
-            
+        # Sizing depends only on balances and capacity, so fetch balances once
+        balances = await self.client.get_balances()
+        spot_available = balances["spot_usdc"]
+        perp_available = balances["perp_margin"]
+        
+        # Calculate max position based on available capital
+        # Need spot USDC for buying + perp margin for shorting
+        max_from_spot = spot_available * 0.95  # Use 95% of spot
+        max_from_perp = perp_available * 4  # 25% margin = 4x leverage max
+        
+        # Position size is limited by both, and by remaining capacity
+        available_size = min(max_from_spot, max_from_perp, self.max_position_usd)
+        size_usd = min(available_size, remaining_capacity)
+        
+        logger.info("💰 Balance check: Spot=$%.2f, Perp=$%.2f, Max size=$%.2f", spot_available, perp_available, size_usd)
+        
+        if size_usd < 5:  # Minimum position lowered for testing
+            logger.warning("Position size $%.2f too small (min $5)", size_usd)
+            return
+        
+        # Check each candidate
+        for opp in candidates:
             # Get current prices
             prices = await self.client.get_prices(opp.coin)
             
-            if prices["spot_ask"] == 0 or prices["perp_bid"] == 0:
-                logger.warning(f"Invalid prices for {opp.coin}")
+            if prices.spot_ask == 0 or prices.perp_bid == 0:
+                logger.warning("Invalid prices for %s", opp.coin)
                 continue
             
             # Execute entry
-            logger.info(f"🎯 Entering {opp.coin}: ${size_usd:.2f} (APR: {opp.funding_apr*100:.1f}%)")
+            logger.info("🎯 Entering %s: $%.2f (APR: %.1f%%)", opp.coin, size_usd, opp.funding_apr * 100)
             
             result = await self.guard.execute_delta_neutral(
                 coin=opp.coin,
                 size_usd=size_usd,
-                spot_price=prices["spot_ask"],
-                perp_price=prices["perp_bid"]
+                spot_price=prices.spot_ask,
+                perp_price=prices.perp_bid
             )
             
             if result.success:
-                logger.info(f"✅ Position opened: {opp.coin}")
+                logger.info("✅ Position opened: %s", opp.coin)
                 
                 # Log to database
                 self.db.log_position_open(
                     coin=opp.coin,
                     size=result.spot_filled,
                     size_usd=size_usd,
-                    entry_spot=prices["spot_ask"],
-                    entry_perp=prices["perp_bid"]
+                    entry_spot=prices.spot_ask,
+                    entry_perp=prices.perp_bid
                 )
                 
                 self.db.log_trade(
@@ -164,7 +185,7 @@ class FundingHarvester:
                     side="buy",
                     market="spot",
                     size=result.spot_filled,
-                    price=prices["spot_ask"],
+                    price=prices.spot_ask,
                     cloid=result.spot_cloid
                 )
                 
@@ -174,35 +195,30 @@ class FundingHarvester:
                     side="sell",
                     market="perp",
                     size=result.perp_filled,
-                    price=prices["perp_bid"],
+                    price=prices.perp_bid,
                     cloid=result.perp_cloid
                 )
             else:
-                logger.warning(f"❌ Entry failed for {opp.coin}: {result.error}")
+                logger.warning("❌ Entry failed for %s: %s", opp.coin, result.error)
             
             # Only enter one position per loop iteration
             break
     
-    async def _funding_log_loop(self):
-        """Log funding payments received."""
-        while self._running:
-            await asyncio.sleep(self.funding_check_interval)
-            
-            try:
-                await self._log_funding_payments()
-            except Exception as e:
-                logger.error(f"Funding log error: {e}")
-    
     async def _log_funding_payments(self):
         """Check and log funding payments for open positions."""
         state = StateConfig.get()
+        positions = dict(state.positions)
+        if not positions:
+            return
+        
+        # One request for every open coin instead of one round trip each
+        rates = await self.client.get_all_funding_rates(list(positions))
         
-        for coin, pos in state.positions.items():
-            # Get current funding rate
-            rate = await self.client.get_funding_rate(coin)
+        for coin, pos in positions.items():
+            rate = rates[coin]
             
             if rate <= 0:
-                logger.warning(f"⚠️ Negative funding for {coin}: {rate:.4%}")
+                logger.warning("⚠️ Negative funding for %s: %.4f%%", coin, rate * 100)
                 # Let MarginMonitor handle this
                 continue
             
@@ -210,7 +226,7 @@ class FundingHarvester:
             # Funding = position_size * funding_rate
             funding_payment = pos.perp_size * rate * pos.entry_price_perp
             
-            logger.info(f"💰 Funding received: ${funding_payment:.4f} for {coin} ({rate:.4%})")
+            logger.info("💰 Funding received: $%.4f for %s (%.4f%%)", funding_payment, coin, rate * 100)
             
             # Log to database
             self.db.log_funding(
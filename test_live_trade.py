@@ -49,14 +49,21 @@ class LiveTradingTest:
         self.spot_fees = 0.0
         self.perp_fees = 0.0
         
+    @staticmethod
+    def _fetch_parallel(*calls):
+        """Run blocking (fn, *args) info calls concurrently; results in call order."""
+        async def _run():
+            return await asyncio.gather(*(asyncio.to_thread(fn, *args) for fn, *args in calls))
+        return asyncio.run(_run())
+    
     def get_account_state(self) -> Dict:
         """Get current account state."""
         try:
-            # Get spot balances
-            spot_state = self.info.spot_user_state(config.ACCOUNT_ADDRESS)
-            
-            # Get perp state
-            perp_state = self.info.user_state(config.ACCOUNT_ADDRESS)
+            # Spot balances and perp state in parallel
+            spot_state, perp_state = self._fetch_parallel(
+                (self.info.spot_user_state, config.ACCOUNT_ADDRESS),
+                (self.info.user_state, config.ACCOUNT_ADDRESS),
+            )
             
             return {
                 "spot": spot_state,
@@ -69,13 +76,14 @@ class LiveTradingTest:
     def get_current_prices(self) -> Tuple[float, float, float, float]:
         """Get current spot and perp prices."""
         try:
-            # Get L2 book for spot
-            spot_book = self.info.l2_snapshot(config.SPOT_SYMBOL)
+            # Spot and perp L2 books in parallel
+            spot_book, perp_book = self._fetch_parallel(
+                (self.info.l2_snapshot, config.SPOT_SYMBOL),
+                (self.info.l2_snapshot, config.PERP_SYMBOL),
+            )
             spot_bid = float(spot_book["levels"][0][0]["px"]) if spot_book["levels"][0] else 0
             spot_ask = float(spot_book["levels"][1][0]["px"]) if spot_book["levels"][1] else 0
             
-            # Get L2 book for perp
-            perp_book = self.info.l2_snapshot(config.PERP_SYMBOL)
             perp_bid = float(perp_book["levels"][0][0]["px"]) if perp_book["levels"][0] else 0
             perp_ask = float(perp_book["levels"][1][0]["px"]) if perp_book["levels"][1] else 0
             
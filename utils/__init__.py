@@ -2,6 +2,7 @@
 from .panic_switch import PanicSwitch
 from .hyperliquid_client import HyperliquidClient
 from .notifier import Notifier, get_notifier
+from .async_hl import AsyncHLClient
 
-__all__ = ['PanicSwitch', 'HyperliquidClient', 'Notifier', 'get_notifier']
+__all__ = ['PanicSwitch', 'HyperliquidClient', 'Notifier', 'get_notifier', 'AsyncHLClient']
 
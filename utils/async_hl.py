@@ -0,0 +1,236 @@
+"""
+AsyncHLClient - Native Async Hyperliquid REST Client
+
+Talks to the /info and /exchange endpoints over one pooled aiohttp
+session instead of pushing every blocking SDK call onto a thread.
+Actions are signed with the SDK's own signing helpers, using the wallet
+and asset map of an existing Exchange instance.
+"""
+
+import inspect
+import logging
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import orjson
+from hyperliquid.utils import constants
+from hyperliquid.utils.signing import (
+    get_timestamp_ms,
+    order_request_to_order_wire,
+    order_wires_to_order_action,
+    sign_l1_action,
+)
+
+logger = logging.getLogger(__name__)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Newer SDK releases take an expires_after argument before is_mainnet
+_SIGN_TAKES_EXPIRES = "expires_after" in inspect.signature(sign_l1_action).parameters
+
+
+class AsyncHLClient:
+    """
+    Async wrapper for the Hyperliquid REST API.
+
+    Info queries need no credentials. Order and cancel actions need an
+    SDK Exchange for its wallet, vault address and coin -> asset map.
+    """
+
+    def __init__(self, exchange=None, base_url: str = constants.MAINNET_API_URL):
+        """
+        Args:
+            exchange: hyperliquid.exchange.Exchange used for signing (optional)
+            base_url: API base URL
+        """
+        self.exchange = exchange
+        self.base_url = base_url
+        self.is_mainnet = base_url == constants.MAINNET_API_URL
+        self._info_url = f"{base_url}/info"
+        self._exchange_url = f"{base_url}/exchange"
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._asset_ids: Dict[str, int] = {}  # name -> asset index, flattened from the SDK maps
+        self._last_nonce = 0  # Nonces must be unique per signer, even within one millisecond
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session lazily, inside the running loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, url: str, payload: Any, timeout: Optional[float] = None) -> Any:
+        """POST a JSON payload (or an already serialized body) and decode the reply."""
+        data = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+        kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout is not None else {}
+        async with self._get_session().post(
+            url, data=data, headers=JSON_HEADERS, **kwargs
+        ) as resp:
+            resp.raise_for_status()
+            return orjson.loads(await resp.read())
+
+    # ==================== INFO ====================
+
+    async def info(self, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """POST an arbitrary /info request, optionally with a tighter timeout (seconds)."""
+        return await self._post(self._info_url, payload, timeout)
+
+    async def meta(self) -> Dict:
+        return await self.info({"type": "meta"})
+
+    async def spot_meta(self) -> Dict:
+        return await self.info({"type": "spotMeta"})
+
+    async def all_mids(self, timeout: Optional[float] = None) -> Dict[str, str]:
+        return await self.info({"type": "allMids"}, timeout)
+
+    async def open_orders(self, user: str) -> List[Dict]:
+        return await self.info({"type": "openOrders", "user": user})
+
+    # ==================== EXCHANGE ====================
+
+    def _asset(self, name: str) -> int:
+        """Asset index for a perp name or spot pair symbol, resolved once per name."""
+        asset = self._asset_ids.get(name)
+        if asset is None:
+            asset = self._asset_ids[name] = self.exchange.info.name_to_asset(name)
+        return asset
+
+    def _sign(self, action: Dict, nonce: int) -> Dict:
+        ex = self.exchange
+        if _SIGN_TAKES_EXPIRES:
+            return sign_l1_action(
+                ex.wallet, action, ex.vault_address, nonce,
+                getattr(ex, "expires_after", None), self.is_mainnet
+            )
+        return sign_l1_action(ex.wallet, action, ex.vault_address, nonce, self.is_mainnet)
+
+    async def _post_action(self, action: Dict) -> Dict:
+        """Sign an L1 action and POST it to /exchange."""
+        return await self._post(self._exchange_url, self._signed_payload(action))
+
+    def _next_nonce(self) -> int:
+        """Millisecond timestamp, bumped past the last one so concurrent actions never share it."""
+        nonce = max(get_timestamp_ms(), self._last_nonce + 1)
+        self._last_nonce = nonce
+        return nonce
+
+    def _signed_payload(self, action: Dict) -> Dict:
+        """Build the /exchange request for an action, signed with a fresh nonce."""
+        if self.exchange is None:
+            raise RuntimeError("AsyncHLClient needs an Exchange to sign actions")
+
+        nonce = self._next_nonce()
+        payload = {
+            "action": action,
+            "nonce": nonce,
+            "signature": self._sign(action, nonce),
+            "vaultAddress": self.exchange.vault_address,
+        }
+        expires_after = getattr(self.exchange, "expires_after", None)
+        if expires_after is not None:
+            payload["expiresAfter"] = expires_after
+        return payload
+
+    def presign(self, action: Dict) -> bytes:
+        """
+        Sign an action now and serialize it for a later post_signed().
+
+        The nonce is fixed at signing time, so a pre-signed body should be
+        refreshed every few seconds and sent at most once.
+        """
+        return orjson.dumps(self._signed_payload(action))
+
+    async def post_signed(self, body: bytes) -> Dict:
+        """POST a body produced by presign() to /exchange."""
+        return await self._post(self._exchange_url, body)
+
+    async def order(
+        self,
+        coin: str,
+        is_buy: bool,
+        sz: float,
+        limit_px: float,
+        order_type: Dict,
+        reduce_only: bool = False
+    ) -> Dict:
+        """Place a single order. Same arguments and response as Exchange.order."""
+        return await self.bulk_orders([{
+            "coin": coin,
+            "is_buy": is_buy,
+            "sz": sz,
+            "limit_px": limit_px,
+            "order_type": order_type,
+            "reduce_only": reduce_only,
+        }])
+
+    async def bulk_orders(self, order_requests: List[Dict]) -> Dict:
+        """
+        Place many orders with one signed action.
+
+        Args:
+            order_requests: SDK-style order requests
+                (coin, is_buy, sz, limit_px, order_type, reduce_only)
+
+        Returns:
+            Exchange response; statuses line up with order_requests
+        """
+        asset = self._asset
+        wires = [order_request_to_order_wire(o, asset(o["coin"])) for o in order_requests]
+        return await self._post_action(order_wires_to_order_action(wires))
+
+    async def bulk_modify(self, modify_requests: List[Dict]) -> Dict:
+        """
+        Amend many resting orders with one signed action.
+
+        Args:
+            modify_requests: [{"oid": ..., "order": <SDK-style order request>}, ...]
+
+        Returns:
+            Exchange response; statuses line up with modify_requests
+        """
+        asset = self._asset
+        return await self._post_action({
+            "type": "batchModify",
+            "modifies": [
+                {
+                    "oid": m["oid"],
+                    "order": order_request_to_order_wire(m["order"], asset(m["order"]["coin"])),
+                }
+                for m in modify_requests
+            ],
+        })
+
+    async def cancel(self, coin: str, oid: int) -> Dict:
+        """Cancel a single order by oid."""
+        return await self.bulk_cancel([{"coin": coin, "oid": oid}])
+
+    async def bulk_cancel(self, cancel_requests: List[Dict]) -> Dict:
+        """
+        Cancel many orders with one signed action.
+
+        Args:
+            cancel_requests: [{"coin": ..., "oid": ...}, ...]
+
+        Returns:
+            Exchange response; statuses line up with cancel_requests
+        """
+        return await self._post_action(self.cancel_action(cancel_requests))
+
+    def cancel_action(self, cancel_requests: List[Dict]) -> Dict:
+        """Unsigned cancel action for [{"coin": ..., "oid": ...}, ...]."""
+        asset = self._asset
+        return {
+            "type": "cancel",
+            "cancels": [
+                {"a": asset(c["coin"]), "o": c["oid"]} for c in cancel_requests
+            ],
+        }
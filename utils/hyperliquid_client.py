@@ -6,20 +6,89 @@ Handles SDK initialization, order placement, and state queries.
 """
 
 import asyncio
+import itertools
 import logging
-import requests
-from typing import Dict, Any, Optional
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 from uuid import uuid4
 
+from hyperliquid.api import API
 from hyperliquid.info import Info
 from hyperliquid.exchange import Exchange
 from hyperliquid.utils import constants
 from eth_account import Account
 
 import config
+from utils.async_hl import AsyncHLClient
 
 logger = logging.getLogger(__name__)
 
+# Streamed top-of-book older than this falls back to REST snapshots
+WS_PRICE_MAX_AGE = 5.0  # seconds
+
+# Order status checks within this window share one openOrders fetch
+OPEN_ORDERS_TTL = 0.5  # seconds
+
+# Funding rates move hourly; one universe fetch serves every coin for this long
+FUNDING_CACHE_TTL = 30.0  # seconds
+
+# REST circuit breaker: trip after this many straight failures, then fail fast
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 10.0  # seconds
+REST_TIMEOUT = 5.0  # seconds, per REST read
+
+
+@dataclass(slots=True)
+class Quote:
+    """Top of book for one coin's spot and perp markets; zeros mean unavailable."""
+    spot_bid: float = 0.0
+    spot_ask: float = 0.0
+    perp_bid: float = 0.0
+    perp_ask: float = 0.0
+
+
+def _top_of_book(book: Dict, fallback: float) -> Tuple[float, float]:
+    """(best bid, best ask) from an L2 snapshot, parsed once; empty sides use fallback."""
+    bids, asks = book["levels"][0], book["levels"][1]
+    return (
+        float(bids[0]["px"]) if bids else fallback,
+        float(asks[0]["px"]) if asks else fallback,
+    )
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one REST endpoint.
+    
+    After `threshold` failures in a row the breaker opens and allow() is
+    False for `cooldown` seconds. The first call after that is a trial:
+    success closes the breaker, a single failure opens it again.
+    """
+    
+    __slots__ = ("name", "threshold", "cooldown", "_failures", "_open_until")
+    
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+    
+    def allow(self) -> bool:
+        return time.monotonic() >= self._open_until
+    
+    def record_success(self):
+        self._failures = 0
+    
+    def record_failure(self):
+        self._failures += 1
+        if self._failures >= self.threshold:
+            self._open_until = time.monotonic() + self.cooldown
+            self._failures = self.threshold - 1  # Trial call decides
+            logger.warning(f"⚡ {self.name} circuit open for {self.cooldown:.0f}s after repeated failures")
+
 
 class HyperliquidClient:
     """
@@ -33,19 +102,59 @@ class HyperliquidClient:
         self.account = Account.from_key(config.PRIVATE_KEY)
         self.address = config.ACCOUNT_ADDRESS
         
-        self.info = Info(constants.MAINNET_API_URL, skip_ws=True)
+        # Fetch the universes once and hand them to both SDK objects, which
+        # would otherwise each fetch meta and spot_meta again on construction
+        api = API(constants.MAINNET_API_URL)
+        meta = api.post("/info", {"type": "meta"})
+        spot_meta = api.post("/info", {"type": "spotMeta"})
+        
+        self.info = Info(constants.MAINNET_API_URL, skip_ws=True, meta=meta, spot_meta=spot_meta)
         self.exchange = Exchange(
             self.account,
             constants.MAINNET_API_URL,
-            account_address=self.address
+            meta=meta,
+            account_address=self.address,
+            spot_meta=spot_meta
         )
         
+        # Keep-alive session for /info queries; opened on first use
+        self.http = AsyncHLClient(self.exchange)
+        
+        # Optional WebSocketManager whose L2 stream serves get_prices
+        self.price_feed = None
+        
+        # (monotonic fetch time, {cloid: order}) for query_order_status
+        self._open_orders_cache = (float('-inf'), {})
+        self._open_orders_lock = asyncio.Lock()
+        
+        # Client order ids: random per-process prefix + counter, no urandom per order
+        self._cloid_prefix = uuid4().hex[:16]
+        self._cloid_ctr = itertools.count()
+        
+        # Fail fast while an endpoint keeps failing
+        self._prices_breaker = CircuitBreaker("prices")
+        self._balances_breaker = CircuitBreaker("balances")
+        self._funding_breaker = CircuitBreaker("funding")
+        
+        # {coin: hourly funding} from the last metaAndAssetCtxs fetch
+        self._funding_cache: Dict[str, float] = {}
+        self._funding_ts = float('-inf')
+        
         # Cache for meta info
-        self._meta_cache = None
+        self._meta_cache = meta
         self._sz_decimals = {}
+        self._load_sz_decimals(meta, spot_meta)
         
         logger.info(f"📡 Client initialized for {self.address[:10]}...")
     
+    async def close(self):
+        """Release the HTTP session."""
+        await self.http.close()
+    
+    def next_cloid(self) -> str:
+        """Unique 32-hex-char client order ID (same shape as uuid4().hex)."""
+        return f"{self._cloid_prefix}{next(self._cloid_ctr):016x}"
+    
     async def place_order(self, coin: str, side: str, is_buy: bool,
                           size: float, price: float, cloid: str) -> Dict[str, Any]:
         """
@@ -62,44 +171,56 @@ class HyperliquidClient:
         Returns:
             {"status": "filled"|"failed", "filled_size": float}
         """
-        loop = asyncio.get_event_loop()
+        request = self._order_request(coin, side, is_buy, size, price)
+        symbol, size, price = request["coin"], request["sz"], request["limit_px"]
         
-        # Get symbol for order
-        symbol = self._get_symbol(coin, side)
-        is_spot = side == "spot"
+        logger.info(f"📤 Placing {side} order: symbol={symbol}, is_buy={is_buy}, size={size}, price={price}")
         
-        # Get proper decimals for this asset
-        sz_decimals = self._get_sz_decimals(symbol, is_spot)
-        size = round(size, sz_decimals)
+        try:
+            result = await self.http.bulk_orders([request])
+            logger.info(f"📥 Order response: {result}")
+            return self._parse_order_result(result)
+        except Exception as e:
+            logger.error("Order placement error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return {"status": "failed", "error": str(e)}
+    
+    async def place_orders_batch(self, orders: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Place several IOC orders with one signed action and one round trip.
         
-        # Round price using SDK formula: 5 significant figures, then proper decimals
-        # Perp: 6 - szDecimals decimals, Spot: 8 - szDecimals decimals
-        price_decimals = (8 if is_spot else 6) - sz_decimals
-        price = round(float(f"{price:.5g}"), price_decimals)
+        Args:
+            orders: [{"coin", "side", "is_buy", "size", "price"}, ...]
+                with the same meaning as the place_order arguments
         
-        logger.info(f"📤 Placing {side} order: symbol={symbol}, is_buy={is_buy}, size={size}, price={price}")
+        Returns:
+            One place_order-style result per order, in the same order
+        """
+        order_requests = [
+            self._order_request(o["coin"], o["side"], o["is_buy"], o["size"], o["price"])
+            for o in orders
+        ]
+        logger.info(f"📤 Placing {len(order_requests)} orders in one batch: {order_requests}")
         
-        def _place():
-            try:
-                result = self.exchange.order(
-                    name=symbol,
-                    is_buy=is_buy,
-                    sz=size,
-                    limit_px=price,
-                    order_type={"limit": {"tif": "Ioc"}},  # IOC for immediate fill
-                    reduce_only=False
-                )
-                logger.info(f"📥 Order response: {result}")
-                return self._parse_order_result(result)
-            except Exception as e:
-                logger.error(f"Order placement error: {e}", exc_info=True)
-                return {"status": "failed", "error": str(e)}
+        try:
+            result = await self.http.bulk_orders(order_requests)
+            logger.info(f"📥 Batch order response: {result}")
+        except Exception as e:
+            logger.error("Batch order placement error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return [{"status": "failed", "error": str(e)} for _ in orders]
+        
+        if result.get("status") != "ok":
+            return [{"status": "failed", "error": str(result)} for _ in orders]
         
-        return await loop.run_in_executor(None, _place)
+        statuses = result.get("response", {}).get("data", {}).get("statuses", [])
+        return [
+            self._parse_order_status(statuses[i]) if i < len(statuses)
+            else {"status": "failed", "error": "No order status returned"}
+            for i in range(len(orders))
+        ]
     
     async def cancel_order(self, coin: str, cloid: str) -> bool:
         """Cancel an order by client order ID."""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
         def _cancel():
             try:
@@ -107,144 +228,170 @@ class HyperliquidClient:
                 result = self.exchange.cancel(coin, cloid)
                 return result.get("status") == "ok"
             except Exception as e:
-                logger.error(f"Cancel error: {e}")
+                logger.error("Cancel error: %s", e)
                 return False
         
         return await loop.run_in_executor(None, _cancel)
     
     async def query_order_status(self, coin: str, cloid: str) -> Dict[str, Any]:
         """Query status of an order by client order ID."""
-        loop = asyncio.get_event_loop()
+        try:
+            # This is a simplified version - actual implementation depends on SDK
+            orders_by_cloid = await self._get_open_orders()
+            if cloid in orders_by_cloid:
+                return {"status": "open", "filled_size": 0}
+            # If not in open orders, assume filled or cancelled
+            return {"status": "filled", "filled_size": 0}  # Simplified
+        except Exception as e:
+            logger.error("Query error: %s", e)
+            return {"status": "unknown"}
+    
+    async def _get_open_orders(self) -> Dict[str, Dict]:
+        """Open orders by cloid, shared by every status query within OPEN_ORDERS_TTL."""
+        async with self._open_orders_lock:
+            fetched_at, orders_by_cloid = self._open_orders_cache
+            if time.monotonic() - fetched_at > OPEN_ORDERS_TTL:
+                orders = await self.http.open_orders(self.address)
+                orders_by_cloid = {o["cloid"]: o for o in orders if o.get("cloid")}
+                self._open_orders_cache = (time.monotonic(), orders_by_cloid)
+            return orders_by_cloid
+    
+    async def get_prices(self, coin: str) -> Quote:
+        """
+        Get current bid/ask prices for spot and perp.
         
-        def _query():
-            try:
-                # This is a simplified version - actual implementation depends on SDK
-                orders = self.info.open_orders(self.address)
-                for order in orders:
-                    if order.get("cloid") == cloid:
-                        return {"status": "open", "filled_size": 0}
-                # If not in open orders, assume filled or cancelled
-                return {"status": "filled", "filled_size": 0}  # Simplified
-            except Exception as e:
-                logger.error(f"Query error: {e}")
-                return {"status": "unknown"}
+        Served from the attached WebSocket book cache when it covers the coin
+        and both books are fresh; otherwise fetched over REST.
+        """
+        streamed = self._streamed_prices(coin)
+        if streamed is not None:
+            return streamed
         
-        return await loop.run_in_executor(None, _query)
+        breaker = self._prices_breaker
+        if not breaker.allow():
+            return Quote()
+        
+        try:
+            # Mids plus both L2 books, fetched concurrently on the pooled session
+            mids, spot_book, perp_book = await asyncio.gather(
+                self.http.all_mids(timeout=REST_TIMEOUT),
+                self.http.info({'type': 'l2Book', 'coin': config.SPOT_SYMBOL}, timeout=REST_TIMEOUT),
+                self.http.info({'type': 'l2Book', 'coin': coin}, timeout=REST_TIMEOUT),
+            )
+            perp_mid = float(mids.get(coin, 0))
+            breaker.record_success()
+            
+            return Quote(*_top_of_book(spot_book, perp_mid), *_top_of_book(perp_book, perp_mid))
+        except Exception as e:
+            breaker.record_failure()
+            logger.error("Price fetch error: %s", e)
+            return Quote()
     
-    async def get_prices(self, coin: str) -> Dict[str, float]:
-        """Get current bid/ask prices for spot and perp."""
-        loop = asyncio.get_event_loop()
+    def _streamed_prices(self, coin: str) -> Optional[Quote]:
+        """Top of book from the WebSocket feed, or None if missing or stale."""
+        if self.price_feed is None or coin != config.PERP_SYMBOL:
+            return None
         
-        def _get():
-            try:
-                mids = self.info.all_mids()
-                perp_mid = float(mids.get(coin, 0))
-                
-                # Get L2 for better prices
-                spot_book = self.info.l2_snapshot(config.SPOT_SYMBOL)
-                perp_book = self.info.l2_snapshot(coin)
-                
-                return {
-                    "spot_bid": float(spot_book["levels"][0][0]["px"]) if spot_book["levels"][0] else perp_mid,
-                    "spot_ask": float(spot_book["levels"][1][0]["px"]) if spot_book["levels"][1] else perp_mid,
-                    "perp_bid": float(perp_book["levels"][0][0]["px"]) if perp_book["levels"][0] else perp_mid,
-                    "perp_ask": float(perp_book["levels"][1][0]["px"]) if perp_book["levels"][1] else perp_mid,
-                }
-            except Exception as e:
-                logger.error(f"Price fetch error: {e}")
-                return {"spot_bid": 0, "spot_ask": 0, "perp_bid": 0, "perp_ask": 0}
+        state = self.price_feed.price_state
+        spot, perp = state.spot, state.perp
+        cutoff = time.time() - WS_PRICE_MAX_AGE
+        if not state.is_ready() or spot.last_update < cutoff or perp.last_update < cutoff:
+            return None
         
-        return await loop.run_in_executor(None, _get)
+        return Quote(spot.best_bid, spot.best_ask, perp.best_bid, perp.best_ask)
     
     async def get_balances(self) -> Dict[str, float]:
         """Get USDC balances for spot and perp accounts."""
-        loop = asyncio.get_event_loop()
-        
-        def _get():
-            try:
-                # Spot balance
-                spot_state = requests.post(
-                    'https://api.hyperliquid.xyz/info',
-                    json={'type': 'spotClearinghouseState', 'user': self.address},
-                    timeout=5
-                ).json()
-                
-                spot_usdc = sum(
-                    float(b.get('total', 0)) 
-                    for b in spot_state.get('balances', []) 
-                    if b.get('coin') == 'USDC'
-                )
-                
-                # Perp balance
-                perp_state = requests.post(
-                    'https://api.hyperliquid.xyz/info',
-                    json={'type': 'clearinghouseState', 'user': self.address},
-                    timeout=5
-                ).json()
-                
-                perp_margin = float(perp_state.get('withdrawable', 0))
-                
-                return {"spot_usdc": spot_usdc, "perp_margin": perp_margin}
-                
-            except Exception as e:
-                logger.error(f"Balance fetch error: {e}")
-                return {"spot_usdc": 0, "perp_margin": 0}
+        breaker = self._balances_breaker
+        if not breaker.allow():
+            return {"spot_usdc": 0, "perp_margin": 0}
         
-        return await loop.run_in_executor(None, _get)
+        try:
+            # Spot and perp account states in parallel
+            spot_state, perp_state = await asyncio.gather(
+                self.http.info({'type': 'spotClearinghouseState', 'user': self.address}, timeout=REST_TIMEOUT),
+                self.http.info({'type': 'clearinghouseState', 'user': self.address}, timeout=REST_TIMEOUT),
+            )
+            breaker.record_success()
+            
+            spot_usdc = sum(
+                float(b.get('total', 0)) 
+                for b in spot_state.get('balances', []) 
+                if b.get('coin') == 'USDC'
+            )
+            
+            perp_margin = float(perp_state.get('withdrawable', 0))
+            
+            return {"spot_usdc": spot_usdc, "perp_margin": perp_margin}
+            
+        except Exception as e:
+            breaker.record_failure()
+            logger.error("Balance fetch error: %s", e)
+            return {"spot_usdc": 0, "perp_margin": 0}
     
     async def get_positions(self) -> Dict[str, Dict]:
         """Get all open perp positions."""
-        loop = asyncio.get_event_loop()
-        
-        def _get():
-            try:
-                state = self.info.user_state(self.address)
-                positions = {}
-                
-                for p in state.get('assetPositions', []):
-                    pos = p['position']
-                    size = float(pos.get('szi', 0))
-                    if size != 0:
-                        positions[pos['coin']] = {
-                            "size": abs(size),
-                            "side": "short" if size < 0 else "long",
-                            "entry_price": float(pos.get('entryPx', 0)),
-                            "liquidation_price": float(pos.get('liquidationPx', 0)),
-                            "unrealized_pnl": float(pos.get('unrealizedPnl', 0))
-                        }
-                
-                return positions
-                
-            except Exception as e:
-                logger.error(f"Position fetch error: {e}")
-                return {}
-        
-        return await loop.run_in_executor(None, _get)
+        try:
+            state = await self.http.info({'type': 'clearinghouseState', 'user': self.address})
+            positions = {}
+            
+            for p in state.get('assetPositions', []):
+                pos = p['position']
+                size = float(pos.get('szi', 0))
+                if size != 0:
+                    positions[pos['coin']] = {
+                        "size": abs(size),
+                        "side": "short" if size < 0 else "long",
+                        "entry_price": float(pos.get('entryPx', 0)),
+                        "liquidation_price": float(pos.get('liquidationPx', 0)),
+                        "unrealized_pnl": float(pos.get('unrealizedPnl', 0))
+                    }
+            
+            return positions
+            
+        except Exception as e:
+            logger.error("Position fetch error: %s", e)
+            return {}
     
     async def get_funding_rate(self, coin: str) -> float:
         """Get current funding rate for a coin."""
-        loop = asyncio.get_event_loop()
+        rates = await self.get_all_funding_rates([coin])
+        return rates.get(coin, 0.0)
+    
+    async def get_all_funding_rates(self, coins: List[str]) -> Dict[str, float]:
+        """
+        Get current funding rates for several coins.
+        
+        The whole universe is fetched with one request at most once per
+        FUNDING_CACHE_TTL; calls in between are dict lookups.
+        
+        Args:
+            coins: Perp coin names
         
-        def _get():
+        Returns:
+            {coin: hourly funding rate}; coins missing from the universe or
+            a failed request map to 0.0
+        """
+        if time.monotonic() - self._funding_ts >= FUNDING_CACHE_TTL:
+            breaker = self._funding_breaker
+            if not breaker.allow():
+                return dict.fromkeys(coins, 0.0)
             try:
                 # Use metaAndAssetCtxs which contains actual funding rate
-                result = requests.post(
-                    'https://api.hyperliquid.xyz/info',
-                    json={'type': 'metaAndAssetCtxs'},
-                    timeout=5
-                ).json()
-                
-                meta, asset_ctxs = result[0], result[1]
-                for i, asset in enumerate(meta.get('universe', [])):
-                    if asset.get('name') == coin:
-                        ctx = asset_ctxs[i] if i < len(asset_ctxs) else {}
-                        return float(ctx.get('funding', 0))
-                return 0.0
+                meta, asset_ctxs = await self.http.info({'type': 'metaAndAssetCtxs'}, timeout=REST_TIMEOUT)
+                self._funding_cache = {
+                    asset['name']: float(ctx.get('funding', 0))
+                    for asset, ctx in zip(meta.get('universe', []), asset_ctxs)
+                }
+                self._funding_ts = time.monotonic()
+                breaker.record_success()
             except Exception as e:
-                logger.error(f"Funding rate error: {e}")
-                return 0.0
+                breaker.record_failure()
+                logger.error("Funding rate error: %s", e)
+                return dict.fromkeys(coins, 0.0)
         
-        return await loop.run_in_executor(None, _get)
+        cache = self._funding_cache
+        return {coin: cache.get(coin, 0.0) for coin in coins}
     
     def _get_symbol(self, coin: str, side: str) -> str:
         """Get the correct symbol for spot or perp."""
@@ -253,40 +400,70 @@ class HyperliquidClient:
         else:
             return coin  # e.g., "HYPE" for perp
     
+    def _order_request(self, coin: str, side: str, is_buy: bool,
+                       size: float, price: float) -> Dict[str, Any]:
+        """Build an SDK order request with size and price rounded for the asset."""
+        # Get symbol for order
+        symbol = self._get_symbol(coin, side)
+        is_spot = side == "spot"
+        
+        # Get proper decimals for this asset
+        sz_decimals = self._get_sz_decimals(symbol, is_spot)
+        size = round(size, sz_decimals)
+        
+        # Round price using SDK formula: 5 significant figures, then proper decimals
+        # Perp: 6 - szDecimals decimals, Spot: 8 - szDecimals decimals
+        price_decimals = (8 if is_spot else 6) - sz_decimals
+        price = round(float(f"{price:.5g}"), price_decimals)
+        
+        return {
+            "coin": symbol,
+            "is_buy": is_buy,
+            "sz": size,
+            "limit_px": price,
+            "order_type": {"limit": {"tif": "Ioc"}},  # IOC for immediate fill
+            "reduce_only": False,
+        }
+    
     def _round_size(self, coin: str, size: float) -> float:
         """Round size to proper decimals for the coin (perp only)."""
         return round(size, self._get_sz_decimals(coin, False))
     
+    def _load_sz_decimals(self, meta: Dict, spot_meta: Dict):
+        """Warm the szDecimals cache for every perp and spot token up front."""
+        try:
+            self._sz_decimals.update(self._perp_sz_decimals(meta))
+            self._sz_decimals.update(self._spot_sz_decimals(spot_meta))
+        except Exception as e:
+            # Not fatal: _get_sz_decimals fetches on a miss
+            logger.warning(f"Could not preload szDecimals: {e}")
+    
+    @staticmethod
+    def _perp_sz_decimals(meta: Dict) -> Dict[str, int]:
+        """{perp name: szDecimals} for a meta response."""
+        return {a['name']: a.get('szDecimals', 2) for a in meta.get('universe', [])}
+    
+    @staticmethod
+    def _spot_sz_decimals(spot_meta: Dict) -> Dict[str, int]:
+        """{"@index": szDecimals} for a spot_meta response."""
+        return {f"@{t.get('index')}": t.get('szDecimals', 2) for t in spot_meta.get('tokens', [])}
+    
     def _get_sz_decimals(self, symbol: str, is_spot: bool) -> int:
         """Get the correct size decimals for an asset."""
-        cache_key = symbol
+        decimals = self._sz_decimals.get(symbol)
+        if decimals is not None:
+            return decimals
         
-        if cache_key not in self._sz_decimals:
-            try:
-                if is_spot:
-                    # Spot assets - get from spot_meta
-                    spot_meta = self.info.spot_meta()
-                    for token in spot_meta.get('tokens', []):
-                        spot_sym = f"@{token.get('index')}"
-                        if spot_sym == symbol:
-                            self._sz_decimals[cache_key] = token.get('szDecimals', 2)
-                            break
-                    if cache_key not in self._sz_decimals:
-                        self._sz_decimals[cache_key] = 2  # Default
-                else:
-                    # Perp assets
-                    meta = self.info.meta()
-                    for asset in meta.get('universe', []):
-                        if asset.get('name') == symbol:
-                            self._sz_decimals[cache_key] = asset.get('szDecimals', 2)
-                            break
-                    if cache_key not in self._sz_decimals:
-                        self._sz_decimals[cache_key] = 2
-            except Exception as e:
-                logger.warning(f"Could not get szDecimals for {symbol}: {e}")
-                self._sz_decimals[cache_key] = 2
+        # Unknown symbol (e.g. a new listing): refresh the whole market's map once
+        try:
+            if is_spot:
+                self._sz_decimals.update(self._spot_sz_decimals(self.info.spot_meta()))
+            else:
+                self._sz_decimals.update(self._perp_sz_decimals(self.info.meta()))
+        except Exception as e:
+            logger.warning(f"Could not get szDecimals for {symbol}: {e}")
         
-        return self._sz_decimals.get(cache_key, 2)
+        return self._sz_decimals.setdefault(symbol, 2)  # Default
     
     def _parse_order_result(self, result: Dict) -> Dict[str, Any]:
         """Parse SDK order result into standardized format."""
@@ -302,18 +479,25 @@ class HyperliquidClient:
             return {"status": "failed", "error": "No order status returned"}
         
         for s in statuses:
-            if "filled" in s:
-                filled = s["filled"]
-                return {
-                    "status": "filled",
-                    "filled_size": float(filled.get("totalSz", 0)),
-                    "avg_price": float(filled.get("avgPx", 0)),
-                    "oid": filled.get("oid")
-                }
-            elif "resting" in s:
-                # Order is on the book (IOC should not happen, but handle it)
-                return {"status": "failed", "error": "Order resting (IOC failed to fill)"}
-            elif "error" in s:
-                return {"status": "failed", "error": s["error"]}
+            if "filled" in s or "resting" in s or "error" in s:
+                return self._parse_order_status(s)
         
         return {"status": "failed", "error": f"Unknown response: {statuses}"}
+    
+    def _parse_order_status(self, s: Dict) -> Dict[str, Any]:
+        """Parse one entry of an order response's statuses list."""
+        if "filled" in s:
+            filled = s["filled"]
+            return {
+                "status": "filled",
+                "filled_size": float(filled.get("totalSz", 0)),
+                "avg_price": float(filled.get("avgPx", 0)),
+                "oid": filled.get("oid")
+            }
+        elif "resting" in s:
+            # Order is on the book (IOC should not happen, but handle it)
+            return {"status": "failed", "error": "Order resting (IOC failed to fill)"}
+        elif "error" in s:
+            return {"status": "failed", "error": s["error"]}
+        
+        return {"status": "failed", "error": f"Unknown response: {s}"}
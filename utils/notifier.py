@@ -9,11 +9,41 @@ import asyncio
 import aiohttp
 import logging
 import os
-from datetime import datetime
-from typing import Optional
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+NOTIFY_QUEUE_MAX = 256      # Pending embeds; the oldest is dropped when full
+NOTIFY_BATCH_MAX = 10       # Discord accepts at most 10 embeds per message
+NOTIFY_COALESCE_WINDOW = 1.0  # Seconds to gather embeds into one message
+EMBED_FIELDS_MAX = 25       # Discord limit on fields per embed
+EMBED_DESCRIPTION_MAX = 4096  # Discord limit on embed description length
+MESSAGE_CHARS_MAX = 6000    # Discord limit on embed text summed over one message
+FOOTER_RESERVE = 64         # Room kept in a merged embed for its "+N repeated" footer
+
+_ts_cache = [0, ""]  # [epoch second, ISO string] for embed timestamps
+
+
+def _embed_chars(embed: dict) -> int:
+    """Characters of an embed that count toward Discord's per-message total."""
+    return (
+        len(embed.get("title", ""))
+        + len(embed.get("description", ""))
+        + len(embed.get("footer", {}).get("text", ""))
+        + len(embed.get("author", {}).get("name", ""))
+        + sum(len(f.get("name", "")) + len(f.get("value", "")) for f in embed.get("fields", []))
+    )
+
+
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601, formatted at most once per second."""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[:] = [now, datetime.fromtimestamp(now, timezone.utc).isoformat()]
+    return _ts_cache[1]
+
 
 class Notifier:
     """
@@ -32,38 +62,183 @@ class Notifier:
         self.enabled = bool(self.webhook_url)
         self.bot_name = "🌾 Funding Bot"
         
+        # One keep-alive session, bound to the loop that created it
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Single worker posts queued embeds; both created inside the running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        
         if not self.enabled:
             logger.warning("⚠️ Discord notifications disabled (no webhook URL)")
     
-    async def _send(self, embed: dict):
-        """Send embed to Discord webhook (non-blocking)."""
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Reuse the webhook session; a new one is made for a different loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+            self._session_loop = loop
+        return self._session
+    
+    async def _send(self, embeds: List[dict]):
+        """Send up to NOTIFY_BATCH_MAX embeds to the Discord webhook in one message."""
         if not self.enabled:
             return
         
         try:
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    "username": self.bot_name,
-                    "embeds": [embed]
-                }
-                async with session.post(
-                    self.webhook_url,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status != 204:
-                        logger.warning(f"Discord webhook failed: {resp.status}")
+            payload = {
+                "username": self.bot_name,
+                "embeds": embeds
+            }
+            async with self._get_session().post(self.webhook_url, json=payload) as resp:
+                if resp.status != 204:
+                    logger.warning(f"Discord webhook failed: {resp.status}")
         except Exception as e:
             logger.error(f"Notification error: {e}")
     
+    async def _send_once(self, embed: dict):
+        """Send from a throwaway loop, closing the session before the loop ends."""
+        try:
+            await self._send([embed])
+        finally:
+            await self.aclose()
+    
+    @staticmethod
+    def _coalesce(embeds: List[dict]) -> List[dict]:
+        """
+        Merge embeds sharing a title into combined embeds.
+        
+        Exact repeats (ignoring the timestamp) are counted rather than
+        repeated. Distinct embeds contribute their description and fields
+        to the title's combined embed; a new one is started when Discord's
+        per-embed limits (or the per-message text total) would be exceeded,
+        so nothing is dropped.
+        """
+        merged: List[dict] = []
+        current: Dict[str, dict] = {}  # title -> combined embed still accepting content
+        repeats: Dict[int, int] = {}   # id(combined embed) -> suppressed exact repeats
+        seen: Dict[str, dict] = {}     # content key -> combined embed holding it
+        
+        for embed in embeds:
+            key = repr({k: v for k, v in embed.items() if k != "timestamp"})
+            if key in seen:
+                target = seen[key]
+                repeats[id(target)] = repeats.get(id(target), 0) + 1
+                continue
+            
+            title = embed.get("title", "")
+            description = embed.get("description", "")
+            embed_fields = embed.get("fields", [])
+            combined = current.get(title)
+            
+            if combined is not None:
+                old_description = combined.get("description", "")
+                new_description = "\n\n".join(filter(None, (old_description, description)))
+                new_fields = combined.get("fields", []) + embed_fields
+                new_chars = _embed_chars({"title": title, "description": new_description, "fields": new_fields})
+                if (len(new_description) <= EMBED_DESCRIPTION_MAX and len(new_fields) <= EMBED_FIELDS_MAX
+                        and new_chars <= MESSAGE_CHARS_MAX - FOOTER_RESERVE):
+                    if new_description:
+                        combined["description"] = new_description
+                    if new_fields:
+                        combined["fields"] = new_fields
+                    seen[key] = combined
+                    continue
+            
+            combined = dict(embed)
+            if embed_fields:
+                combined["fields"] = list(embed_fields)
+            current[title] = combined
+            seen[key] = combined
+            merged.append(combined)
+        
+        for combined in merged:
+            count = repeats.get(id(combined))
+            if count:
+                combined["footer"] = {"text": f"+{count} repeated in the last {NOTIFY_COALESCE_WINDOW:.0f}s"}
+        return merged
+    
+    @staticmethod
+    def _split_messages(embeds: List[dict]) -> List[List[dict]]:
+        """Group embeds into messages within Discord's embed-count and text-total limits."""
+        messages: List[List[dict]] = []
+        message: List[dict] = []
+        chars = 0
+        for embed in embeds:
+            size = _embed_chars(embed)
+            if message and (len(message) == NOTIFY_BATCH_MAX or chars + size > MESSAGE_CHARS_MAX):
+                messages.append(message)
+                message, chars = [], 0
+            message.append(embed)
+            chars += size
+        if message:
+            messages.append(message)
+        return messages
+    
+    async def _worker(self):
+        """Post queued embeds, one message per coalescing window."""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + NOTIFY_COALESCE_WINDOW
+            
+            # Gather whatever else arrives within the window
+            while len(batch) < NOTIFY_QUEUE_MAX:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                for message in self._split_messages(self._coalesce(batch)):
+                    await self._send(message)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def aclose(self, timeout: float = 5.0):
+        """Flush pending notifications (up to timeout seconds), then close the session."""
+        if self._worker_task is not None and not self._worker_task.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._queue.qsize()} unsent notifications")
+            self._worker_task.cancel()
+        self._worker_task = None
+        self._queue = None
+        
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+    
     def _fire_and_forget(self, embed: dict):
-        """Fire notification without blocking."""
+        """Queue a notification for the background worker without blocking."""
+        if not self.enabled:
+            return
+        
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(self._send(embed))
-            else:
-                asyncio.run(self._send(embed))
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop (e.g. CLI paths): send synchronously on a throwaway loop
+                asyncio.run(self._send_once(embed))
+                return
+            
+            if self._worker_task is None or self._worker_task.done():
+                self._queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_MAX)
+                self._worker_task = asyncio.create_task(self._worker())
+            
+            if self._queue.full():
+                self._queue.get_nowait()  # Drop the oldest
+                self._queue.task_done()
+            self._queue.put_nowait(embed)
         except Exception as e:
             logger.error(f"Fire and forget error: {e}")
     
@@ -79,7 +254,7 @@ class Notifier:
                 {"name": "Mode", "value": mode, "inline": True},
                 {"name": "Max Size", "value": f"${size}", "inline": True},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -89,7 +264,7 @@ class Notifier:
             "title": "🛑 Bot Stopped",
             "color": 0xffff00,  # Yellow
             "description": f"Reason: {reason}",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -102,7 +277,7 @@ class Notifier:
             "fields": [
                 {"name": "Positions Closed", "value": str(positions), "inline": True},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -115,7 +290,7 @@ class Notifier:
                 {"name": "Type", "value": error_type, "inline": True},
                 {"name": "Message", "value": f"```{message[:500]}```", "inline": False},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -133,7 +308,7 @@ class Notifier:
                 {"name": "Spot Entry", "value": f"${spot_price:.4f}", "inline": True},
                 {"name": "Perp Entry", "value": f"${perp_price:.4f}", "inline": True},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -150,7 +325,7 @@ class Notifier:
                 {"name": "PnL", "value": f"${pnl:+.4f}", "inline": True},
                 {"name": "Reason", "value": reason, "inline": False},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -164,7 +339,7 @@ class Notifier:
                 {"name": "Amount", "value": f"${amount:.4f}", "inline": True},
                 {"name": "Total Earned", "value": f"${total:.4f}", "inline": True},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -177,7 +352,7 @@ class Notifier:
                 {"name": "Margin Ratio", "value": f"{margin_ratio:.1%}", "inline": True},
                 {"name": "Action", "value": action, "inline": True},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
     
@@ -191,7 +366,7 @@ class Notifier:
                 {"name": "Funding APR", "value": f"{funding_apr:.1f}%", "inline": True},
                 {"name": "Net APY", "value": f"{net_apy:.1f}%", "inline": True},
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now_iso()
         }
         self._fire_and_forget(embed)
 
@@ -10,12 +10,17 @@ Called when:
 
 import asyncio
 import logging
-from uuid import uuid4
+from typing import Dict, List, Optional, Tuple
 
 from core.state import StateConfig
 
+import config
+
 logger = logging.getLogger(__name__)
 
+PRESIGN_INTERVAL = 2.0  # seconds between cancel-all re-signs while orders rest
+PRESIGN_IDLE_INTERVAL = 30.0  # seconds between open-order checks while none rest
+
 
 class PanicSwitch:
     """
@@ -31,6 +36,51 @@ class PanicSwitch:
         """
         self.client = client
         self.panic_slippage = 0.05  # 5% - Accept bad fills to exit fast
+        
+        # Signed "cancel every open order" body, kept fresh by the presigner
+        self._presigned_cancel_all: Optional[bytes] = None
+        self._presign_task: Optional[asyncio.Task] = None
+    
+    def start_presigner(self):
+        """Start keeping a signed cancel-all ready for emergency_close_all."""
+        if self._presign_task is None or self._presign_task.done():
+            self._presign_task = asyncio.create_task(self._presign_loop())
+    
+    def stop(self):
+        """Stop the presigner."""
+        if self._presign_task is not None:
+            self._presign_task.cancel()
+            self._presign_task = None
+        self._presigned_cancel_all = None
+    
+    async def _presign_loop(self):
+        """
+        Keep a signed cancel for the current open orders.
+        
+        The bot's own orders are IOC and never rest, so open orders are
+        usually absent; the poll slows to PRESIGN_IDLE_INTERVAL until some
+        appear, then re-signs every PRESIGN_INTERVAL.
+        """
+        http = self.client.http
+        while True:
+            orders = None
+            try:
+                orders = await http.open_orders(self.client.address)
+                self._presigned_cancel_all = http.presign(http.cancel_action(
+                    [{"coin": o["coin"], "oid": o["oid"]} for o in orders]
+                )) if orders else None
+            except Exception as e:
+                logger.debug(f"Cancel-all presign failed: {e}")
+                self._presigned_cancel_all = None
+            await asyncio.sleep(PRESIGN_INTERVAL if orders else PRESIGN_IDLE_INTERVAL)
+    
+    async def _send_presigned_cancel(self, body: bytes):
+        """Fire the pre-signed cancel-all."""
+        try:
+            result = await self.client.http.post_signed(body)
+            logger.warning(f"🧹 Pre-signed cancel-all sent: {result.get('status')}")
+        except Exception as e:
+            logger.error(f"Pre-signed cancel-all failed: {e}")
     
     async def emergency_close_all(self) -> bool:
         """
@@ -43,71 +93,86 @@ class PanicSwitch:
         
         state = StateConfig.get()
         
+        # Resting orders are pulled with the already-signed cancel-all, alongside the closes
+        cancel_body, self._presigned_cancel_all = self._presigned_cancel_all, None
+        cancel_task = asyncio.create_task(self._send_presigned_cancel(cancel_body)) if cancel_body else None
+        
         if not state.positions:
             logger.info("No positions to close")
+            if cancel_task is not None:
+                await cancel_task
             return True
         
-        success = True
+        # One allMids snapshot prices every leg, instead of two L2 books per coin
+        try:
+            mids = await self.client.http.all_mids()
+        except Exception as e:
+            logger.error(f"Mid price snapshot failed, using entry prices: {e}")
+            mids = {}
         
-        for coin, pos in list(state.positions.items()):
+        # Price every coin's legs off the snapshot; all of them go out in one signed batch
+        closes = []  # (coin, spot_size, spot_limit, perp_size, perp_limit)
+        for coin, pos in state.positions.items():
             logger.warning(f"💣 Emergency closing {coin}: Spot {pos.spot_size}, Perp {pos.perp_size}")
             
-            try:
-                # Get current prices
-                prices = await self.client.get_prices(coin)
-                spot_price = prices.get("spot_bid", pos.entry_price_spot)
-                perp_price = prices.get("perp_ask", pos.entry_price_perp)
-                
-                # Aggressive limit prices for market-like execution
-                spot_limit = round(spot_price * (1 - self.panic_slippage), 5)  # Sell cheap
-                perp_limit = round(perp_price * (1 + self.panic_slippage), 5)  # Buy high
-                
-                # Close both legs simultaneously
-                results = await asyncio.gather(
-                    self._close_spot(coin, pos.spot_size, spot_limit),
-                    self._close_perp(coin, pos.perp_size, perp_limit),
-                    return_exceptions=True
-                )
-                
-                spot_ok = not isinstance(results[0], Exception) and results[0]
-                perp_ok = not isinstance(results[1], Exception) and results[1]
-                
-                if spot_ok and perp_ok:
-                    state.remove_position(coin)
-                    logger.info(f"✅ Closed {coin}")
-                else:
-                    logger.error(f"❌ Failed to fully close {coin}: spot={spot_ok} perp={perp_ok}")
-                    success = False
-                    
-            except Exception as e:
-                logger.error(f"Panic close error for {coin}: {e}")
+            # Spot mids are keyed by the pair symbol (e.g. "@107"), perps by coin
+            spot_price = float(mids.get(config.SPOT_SYMBOL) or 0) or pos.entry_price_spot
+            perp_price = float(mids.get(coin) or 0) or pos.entry_price_perp
+            
+            # Aggressive limit prices for market-like execution
+            spot_limit = round(spot_price * (1 - self.panic_slippage), 5)  # Sell cheap
+            perp_limit = round(perp_price * (1 + self.panic_slippage), 5)  # Buy high
+            closes.append((coin, pos.spot_size, spot_limit, pos.perp_size, perp_limit))
+        
+        results = await self._close_legs(closes)
+        
+        success = True
+        for coin, (spot_ok, perp_ok) in results.items():
+            if spot_ok and perp_ok:
+                state.remove_position(coin)
+                logger.info(f"✅ Closed {coin}")
+            else:
+                logger.error(f"❌ Failed to fully close {coin}: spot={spot_ok} perp={perp_ok}")
                 success = False
         
+        if cancel_task is not None:
+            await cancel_task
+        
         return success
     
-    async def _close_spot(self, coin: str, size: float, price: float) -> bool:
-        """Sell spot position."""
-        try:
-            result = await asyncio.wait_for(
-                self.client.place_order(coin, "spot", False, size, price, uuid4().hex),
-                timeout=10.0
-            )
-            return result.get("status") == "filled"
-        except Exception as e:
-            logger.error(f"Spot close failed: {e}")
-            return False
-    
-    async def _close_perp(self, coin: str, size: float, price: float) -> bool:
-        """Close perp short (buy back)."""
+    async def _close_legs(self, closes: List[Tuple[str, float, float, float, float]]) -> Dict[str, Tuple[bool, bool]]:
+        """
+        Sell spot and buy back the perp short for every position with one batched order action.
+        
+        Args:
+            closes: [(coin, spot_size, spot_price, perp_size, perp_price), ...]
+        
+        Returns:
+            {coin: (spot_ok, perp_ok)}
+        """
+        orders = []
+        for coin, spot_size, spot_price, perp_size, perp_price in closes:
+            orders.append({"coin": coin, "side": "spot", "is_buy": False, "size": spot_size, "price": spot_price})
+            orders.append({"coin": coin, "side": "perp", "is_buy": True, "size": perp_size, "price": perp_price})
+        
         try:
-            result = await asyncio.wait_for(
-                self.client.place_order(coin, "perp", True, size, price, uuid4().hex),
-                timeout=10.0
-            )
-            return result.get("status") == "filled"
+            statuses = await asyncio.wait_for(self.client.place_orders_batch(orders), timeout=10.0)
         except Exception as e:
-            logger.error(f"Perp close failed: {e}")
-            return False
+            logger.error(f"Close batch failed: {e}")
+            return {c[0]: (False, False) for c in closes}
+        
+        # Statuses line up with orders: spot leg at 2i, perp leg at 2i + 1
+        results = {}
+        for i, (coin, *_) in enumerate(closes):
+            spot_result, perp_result = statuses[2 * i], statuses[2 * i + 1]
+            spot_ok = spot_result.get("status") == "filled"
+            perp_ok = perp_result.get("status") == "filled"
+            if not spot_ok:
+                logger.error(f"Spot close failed for {coin}: {spot_result.get('error')}")
+            if not perp_ok:
+                logger.error(f"Perp close failed for {coin}: {perp_result.get('error')}")
+            results[coin] = (spot_ok, perp_ok)
+        return results
     
     async def close_single(self, coin: str) -> bool:
         """Emergency close a single position."""
@@ -122,13 +187,12 @@ class PanicSwitch:
         try:
             prices = await self.client.get_prices(coin)
             
-            results = await asyncio.gather(
-                self._close_spot(coin, pos.spot_size, prices["spot_bid"] * 0.95),
-                self._close_perp(coin, pos.perp_size, prices["perp_ask"] * 1.05),
-                return_exceptions=True
-            )
+            results = await self._close_legs([
+                (coin, pos.spot_size, prices.spot_bid * 0.95, pos.perp_size, prices.perp_ask * 1.05)
+            ])
+            spot_ok, perp_ok = results[coin]
             
-            if all(not isinstance(r, Exception) and r for r in results):
+            if spot_ok and perp_ok:
                 state.remove_position(coin)
                 return True
             
@@ -71,19 +71,24 @@ class WebSocketManager:
     - Subscribes to L2 book for both Spot (@107) and Perp (HYPE)
     - Maintains local price state for low-latency spread calculations
     - Triggers callback on every price update
+    - Optionally streams account state (webData2) and fills (userFills)
     - Auto-reconnects on disconnect with exponential backoff
     """
     
-    def __init__(self, on_price_update: Optional[Callable[[PriceState], None]] = None):
+    def __init__(self, on_price_update: Optional[Callable[[PriceState], None]] = None,
+                 on_user_update: Optional[Callable[[Dict[str, Any]], None]] = None):
         """
         Initialize WebSocket manager.
         
         Args:
             on_price_update: Callback function triggered on every price update.
                             Receives PriceState as argument.
+            on_user_update: Optional callback for webData2/userFills messages of
+                            config.ACCOUNT_ADDRESS. Receives the raw message.
         """
         self.ws_url = config.WS_URL
         self.on_price_update = on_price_update
+        self.on_user_update = on_user_update
         self.price_state = PriceState()
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
         self._running = False
@@ -108,6 +113,9 @@ class WebSocketManager:
                     await self._subscribe_l2_book(config.SPOT_SYMBOL)
                     await self._subscribe_l2_book(config.PERP_SYMBOL)
                     
+                    if self.on_user_update:
+                        await self._subscribe_user(config.ACCOUNT_ADDRESS)
+                    
                     logger.info("✅ WebSocket connected and subscribed to L2 books")
                     
                     # Listen for messages
@@ -143,6 +151,22 @@ class WebSocketManager:
         await self._ws.send(json.dumps(subscription))
         logger.debug(f"Subscribed to L2 book: {symbol}")
     
+    async def _subscribe_user(self, user: str) -> None:
+        """Subscribe to account state and fills for a user."""
+        if not self._ws:
+            return
+        
+        for sub_type in ("webData2", "userFills"):
+            subscription = {
+                "method": "subscribe",
+                "subscription": {
+                    "type": sub_type,
+                    "user": user
+                }
+            }
+            await self._ws.send(json.dumps(subscription))
+        logger.debug(f"Subscribed to user events: {user}")
+    
     async def _listen(self) -> None:
         """Listen for WebSocket messages and update state."""
         if not self._ws:
@@ -165,6 +189,11 @@ class WebSocketManager:
             logger.debug(f"Subscription confirmed: {data}")
             return
         
+        if channel in ("webData2", "userFills"):
+            if self.on_user_update:
+                self.on_user_update(data)
+            return
+        
         if channel == "l2Book":
             book_data = data.get("data", {})
             coin = book_data.get("coin", "")